@@ -1,12 +1,30 @@
+from utils.rng import make_rng
+
 class BaseAlgorithm():
-    def __init__(self, options):
+    def __init__(self, options, rng=None):
         self.options = options
         self.N = options.N
         self.k = options.k
+        self.rng = make_rng(rng if rng is not None else getattr(options, "seed", None))
         self.final_weights = None
     
     def check_parameters(self):
         pass
 
     def solve(self):
-        pass
\ No newline at end of file
+        pass
+
+    def resolve(self, time_budget=None):
+        """Solves again after null_degrees has changed. Solvers that can start from
+        their previous solution override this; time_budget is in milliseconds."""
+        return self.solve()
+
+    def track(self, null_degrees_stream, time_budget=None):
+        """Yields the result of solving for every update in the stream. Each update is a
+        null degree or a list of null degrees. The first update is solved from scratch,
+        the rest are warm-started from the previous solution by resolve()."""
+        for idx, null_degrees in enumerate(null_degrees_stream):
+            if isinstance(null_degrees, (int, float)):
+                null_degrees = [null_degrees]
+            self.null_degrees = list(null_degrees)
+            yield self.solve() if idx == 0 else self.resolve(time_budget)
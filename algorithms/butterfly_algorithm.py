@@ -1,99 +1,117 @@
-from math import pi, cos, sin, radians, log10, nan
-from cmath import exp, phase
+from math import pi, log10
+from time import perf_counter
+
+import numpy as np
+
 from .base_algorithm import BaseAlgorithm
 
-from utils.pattern import compute_pattern, compute_single_pattern
-from utils.converter import vectorWrapToPi, wrapToPi
+from utils.robust_null import SteeringCache
 
 class ButterflyAlgorithm(BaseAlgorithm):
     """ Finds nulls by gradually widening the vectors
-    symmetrically (like a butterfly)to reduce the absolute 
-    value of the pattern. 
+    symmetrically (like a butterfly)to reduce the absolute
+    value of the pattern.
+
+    Every sweep evaluates all symmetric pair moves at once against
+    the combined objective (sum of |AF|^2 over all null degrees, or
+    over all frequencies and angles of the robust objective).
     """
 
-    def __init__(self, options):
-        super().__init__(options)
+    def __init__(self, options, rng=None):
+        super().__init__(options, rng)
         self.main_ang = options.main_ang
         self.null_degrees = options.null_degrees
         self.bit_count = options.bit_count
         self.bit_resolution = options.bit_resolution
+        self.max_sweeps = getattr(options, "max_sweeps", 10 * options.N)
+        self.track_time_limit = getattr(options, "track_time_limit", None)
+        self.steering_cache = SteeringCache(options)
         self.pattern = 0
 
         self.check_parameters()
-        
+
     def check_parameters(self):
         super().check_parameters()
-        assert len(self.null_degrees) == 1
-    
+        assert len(self.null_degrees) >= 1
+
     def get_weights(self):
-        weights = [exp(1j * x) for x in self.vector_changes]
+        weights = [complex(x) for x in np.exp(1j * self.vector_changes)]
         return weights
-    
+
     def get_final_weights(self):
-        weights = [exp(1j * (x+self.alpha/2)) for x in self.vector_changes]
+        weights = [complex(x) for x in np.exp(1j * (self.vector_changes + self.alpha/2))]
         return weights
 
     def update_pattern(self):
-        pattern_values = compute_pattern(
-            N=self.N,
-            k=self.k,
-            weights=self.get_weights(),
-            degrees=self.null_degrees,
-            use_absolute_value=False
-        )
-        self.pattern = pattern_values[0]
+        self.patterns = self.steering @ np.exp(1j * self.vector_changes)
+        self.pattern = self.patterns[np.argmax(np.abs(self.patterns))]
 
     def solve(self):
         self.alpha = (2*pi) / (2**self.bit_resolution)
+        self.steering = self.steering_cache(self.null_degrees)
 
-        self.null_deg = self.null_degrees[0]
-        self.theta = pi * cos(radians(self.null_deg))
-
-        self.vector_dirs = [wrapToPi(-k * self.theta) for k in range(self.N)]
-        self.sum_dir = wrapToPi(phase(sum([exp(1j* x) for x in self.vector_dirs])))
-
-        self.vector_changes = [0.0] * self.N
+        self.vector_changes = np.zeros(self.N)
         self.vector_change_limit_pos = self.alpha * (2**self.bit_count-2) / 2
         self.vector_change_limit_neg = -self.alpha * (2**self.bit_count) / 2
-        
+
+        return self.descend()
+
+    def resolve(self, time_budget=None):
+        """Starts from the previous vector changes instead of zero."""
+        if not hasattr(self, "vector_changes"):
+            return self.solve()
+        self.steering = self.steering_cache(self.null_degrees)
+        time_budget = self.track_time_limit if time_budget is None else time_budget
+        return self.descend(None if time_budget is None else perf_counter() + time_budget / 1000)
+
+    def descend(self, deadline=None):
+        """Applies pair moves until none of them improves the objective (or the deadline passes)."""
+        idx = np.arange(self.N // 2) # index for half the vectors
+        other = self.N - 1 - idx # the other vectors, symmetric to vector[idx]
+        directions = np.array([1.0, -1.0])[:, None]
+
         self.update_pattern()
+        objective = np.sum(np.abs(self.patterns) ** 2)
+
+        for _ in range(self.max_sweeps):
+            if deadline is not None and perf_counter() > deadline:
+                break
+            # All candidate moves: widen (+1) or narrow (-1) every pair, shape (2, N//2)
+            new_idx = self.normalize_change_vector(self.vector_changes[idx] + directions * self.alpha)
+            new_other = self.normalize_change_vector(self.vector_changes[other] - directions * self.alpha)
+
+            weights = np.exp(1j * self.vector_changes)
+            deltas = (
+                (np.exp(1j * new_idx) - weights[idx])[..., None] * self.steering[:, idx].T
+                + (np.exp(1j * new_other) - weights[other])[..., None] * self.steering[:, other].T
+            ) # shape (2, N//2, len(null_degrees))
+            candidate_objectives = np.sum(np.abs(self.patterns + deltas) ** 2, axis=-1)
+
+            best_dir, best_pair = np.unravel_index(np.argmin(candidate_objectives), candidate_objectives.shape)
+            best_objective = candidate_objectives[best_dir, best_pair]
+            if best_objective >= objective:
+                break
+
+            # Pairs never share an element, so every improving move can be applied together.
+            pair_dirs = np.argmin(candidate_objectives, axis=0)
+            pairs = np.nonzero(candidate_objectives[pair_dirs, np.arange(len(idx))] < objective)[0]
+            combined_patterns = self.patterns + np.sum(deltas[pair_dirs[pairs], pairs], axis=0)
+            combined_objective = np.sum(np.abs(combined_patterns) ** 2)
+
+            if combined_objective < best_objective:
+                self.vector_changes[idx[pairs]] = new_idx[pair_dirs[pairs], pairs]
+                self.vector_changes[other[pairs]] = new_other[pair_dirs[pairs], pairs]
+            else:
+                self.vector_changes[idx[best_pair]] = new_idx[best_dir, best_pair]
+                self.vector_changes[other[best_pair]] = new_other[best_dir, best_pair]
 
-        pattern_before_loop = nan
-        while pattern_before_loop != self.pattern:
-            pattern_before_loop = self.pattern
-            for idx in range(self.N // 2): # index for half the vectors
-                original_vector_changes = self.vector_changes[:]
-                original_pattern = self.pattern
-                other = self.N - 1 - idx # the other vector, symmteric to vector[idx] wrt sum
-                angle_with_sum = wrapToPi(self.vector_dirs[idx] + self.vector_changes[idx] - self.sum_dir)
-                
-                if 0 <= angle_with_sum < pi - self.alpha/2: # the vector is after the sum direction (left half)
-                    self.vector_changes[idx] += self.alpha
-                    self.vector_changes[other] -= self.alpha
-                elif -pi + self.alpha/2 < angle_with_sum <= 0: # the vector is before the sum direction (right half)
-                    self.vector_changes[idx] -= self.alpha
-                    self.vector_changes[other] += self.alpha
-
-                self.normalize_change_vector(idx)
-                self.normalize_change_vector(other)
-
-                self.vector_changes = vectorWrapToPi(self.vector_changes)
-                    
-                self.update_pattern()
-
-                patternDirectionTurned = abs(cos(phase(self.pattern) - self.sum_dir) + 1) < 1e-9
-                if (patternDirectionTurned):
-                    if abs(original_pattern) < abs(self.pattern):
-                        self.vector_changes = original_vector_changes[:]
-                        self.update_pattern()
+            self.update_pattern()
+            objective = np.sum(np.abs(self.patterns) ** 2)
 
         return (
             self.get_final_weights(),
             -20 * log10(abs(self.pattern))
         )
 
-    def normalize_change_vector(self, idx):
-        limit_pos = self.vector_change_limit_pos
-        limit_neg = self.vector_change_limit_neg
-        self.vector_changes[idx] = min(limit_pos, self.vector_changes[idx])
-        self.vector_changes[idx] = max(limit_neg, self.vector_changes[idx])
+    def normalize_change_vector(self, changes):
+        return np.clip(changes, self.vector_change_limit_neg, self.vector_change_limit_pos)
@@ -1,15 +1,18 @@
 from .base_algorithm import BaseAlgorithm
-from utils.pattern import compute_single_pattern
+from utils.pattern import steering_matrix
 import numpy as np
 
 class CpxLstsqAlgorithm(BaseAlgorithm):
     """ Finds nulls by considering the linear equations 
     that come out of the nulling and mainlobe constraints
     """
-    def __init__(self, options):
-        BaseAlgorithm.__init__(self, options)
+    def __init__(self, options, rng=None):
+        BaseAlgorithm.__init__(self, options, rng)
         self.null_degrees = options.null_degrees
         self.main_ang = options.main_ang
+        self.positions = getattr(options, "positions", None)
+        # The mainlobe row is the same for every problem this solver answers
+        self.main_steering = steering_matrix(N=self.N, k=self.k, degrees=[self.main_ang], positions=self.positions)
         self.check_parameters()
 
     def check_parameters(self):
@@ -21,11 +24,36 @@ class CpxLstsqAlgorithm(BaseAlgorithm):
         """ Defines and solves a set of linear equations for the required nulls and the mainlobe
         """
         b = np.array([1] + [0] * len(self.null_degrees))
-        A = np.array(compute_single_pattern(N=self.N, k=self.k, degrees=[self.main_ang] + self.null_degrees))
+        A = np.vstack([
+            self.main_steering,
+            steering_matrix(N=self.N, k=self.k, degrees=list(self.null_degrees), positions=self.positions)
+        ])
 
         self.final_weights = np.linalg.lstsq(A, b, rcond=None)[0].tolist()
         return self.final_weights
 
+    def solve_batch(self, null_degrees_batch):
+        """ Solves the equations of several problems with the same number of nulls at once,
+        using one stacked pseudo-inverse. Returns one list of weights per problem.
+        """
+        assert len(set(len(x) for x in null_degrees_batch)) == 1, \
+            "All problems in a batch should have the same number of null degrees"
+        null_count = len(null_degrees_batch[0])
+        assert null_count + 1 < self.N, \
+             "Number of null degrees should be less than number of antennas minus 1"
+        nulls = steering_matrix(
+            N=self.N, k=self.k, degrees=[d for x in null_degrees_batch for d in x], positions=self.positions
+        ).reshape(
+            len(null_degrees_batch), null_count, self.N
+        )
+        main = np.broadcast_to(self.main_steering, (len(null_degrees_batch), 1, self.N))
+        A = np.concatenate([main, nulls], axis=1)
+        b = np.zeros(null_count + 1)
+        b[0] = 1
+
+        weights = np.linalg.pinv(A) @ b
+        return weights.tolist()
+
 
 
 
@@ -1,10 +1,16 @@
-from random import randrange, random, choice, sample
 from cmath import exp, phase
 from math import log10, pi, nan, cos, sin
 from typing import List
 from time import time_ns
 
-from utils.pattern import compute_pattern, compute_single_pattern
+import numpy as np
+
+from utils.pattern import complex_dtype
+from utils.robust_null import SteeringCache
+from utils.backend import make_backend
+from utils.convergence import ConvergenceTracker
+from utils.robustness import MonteCarloRobustness
+from utils.bucket_index import BucketIndex
 
 from .base_algorithm import BaseAlgorithm
 
@@ -15,23 +21,64 @@ class Chromosome:
     MUTATION_FACTOR = None
 
     @classmethod
-    def init_consts(cls, options):
+    def init_consts(cls, options, rng):
+        cls.RNG = rng
         cls.N = options.N
         cls.K = options.k
         cls.BIT_COUNT = options.bit_count
         cls.BIT_RESOLUTION = options.bit_resolution
         cls.MUTATION_FACTOR = options.mutation_factor
         cls.COOKING_FACTOR = options.cooking_factor
-        cls.NULL_DEGREES = options.null_degrees
+        cls.OPTIONS = options
+        # The robust objective scores the worst (frequency, angle) instead of the best null
+        cls.ROBUST = getattr(options, "objective", "nominal") == "robust"
+        cls.STEERING_CACHE = SteeringCache(options)
+        cls.set_null_degrees(options.null_degrees)
+
+    @classmethod
+    def set_null_degrees(cls, null_degrees):
+        """Sets the null degrees and caches their steering matrix for update_pattern."""
+        cls.NULL_DEGREES = null_degrees
+        cls.STEERING = cls.STEERING_CACHE(null_degrees)
+
+    @classmethod
+    def batch_patterns(cls, genes, precision="double", backend=None):
+        """Computes the pattern of many genes at once (one row of genes per chromosome),
+        as update_pattern would, in the given precision and optionally on a ChunkedBackend."""
+        dtype = complex_dtype(precision)
+        weights = cls.batch_weights(genes).astype(dtype)
+        steering = cls.STEERING.astype(dtype)
+        patterns = weights @ steering.T if backend is None else backend.project(weights, steering)
+        select = np.argmax if cls.ROBUST else np.argmin
+        return patterns[np.arange(len(patterns)), select(np.abs(patterns), axis=1)]
+
+    @classmethod
+    def batch_weights(cls, genes):
+        """Returns the weights of many genes at once, as get_weights would."""
+        angles = (np.asarray(genes) - (2**cls.BIT_COUNT-1)/2) * (2*pi) / (2**cls.BIT_RESOLUTION)
+        return np.exp(1j * angles)
 
     @classmethod
-    def new_gene(cls):
-        return randrange(0, 2**cls.BIT_COUNT)
+    def rank_values(cls, genes, patterns):
+        """Returns the values the sample is sorted by (ascending): here |pattern|, the same
+        order as get_score. Subclasses can use it to push infeasible genes to the end."""
+        return np.abs(patterns)
+
+    @classmethod
+    def new_gene(cls, size=None):
+        return cls.RNG.integers(0, 2**cls.BIT_COUNT, size=size)
+
+    @classmethod
+    def gene_embedding(cls):
+        """Returns one point per gene value, used to measure the diversity of a sample:
+        the phase of each code on the unit circle, so that codes that wrap around are close."""
+        weights = cls.batch_weights(np.arange(2**cls.BIT_COUNT))
+        return np.column_stack([weights.real, weights.imag])
     
     def __init__(self, initial_weights=None, shufflize=True):
         self.pattern = nan
         if initial_weights is None:
-            self.gene = [Chromosome.new_gene() for _ in range(self.N)]
+            self.gene = self.new_gene(self.N).tolist()
         else:
             # ! This is duplicate code with NullSlider from VisualizerUI
             angles = [phase(x) for x in initial_weights]
@@ -40,15 +87,12 @@ class Chromosome:
                 for angle in angles
             ]
             if shufflize:
-                for idx in range(self.N):
-                    increment = 0
-                    if int(random() > self.COOKING_FACTOR):
-                        if self.gene[idx] == 0:
-                            self.gene[idx] += 1
-                        elif self.gene[idx] == 2*self.BIT_COUNT - 1:
-                            self.gene[idx] -= 1
-                        else:
-                            self.gene[idx] += choice([1, -1])
+                gene = np.array(self.gene)
+                steps = self.RNG.integers(0, 2, size=self.N) * 2 - 1
+                steps[gene == 0] = 1
+                steps[gene == 2**self.BIT_COUNT - 1] = -1
+                cooked = self.RNG.random(self.N) > self.COOKING_FACTOR
+                self.gene = (gene + steps * cooked).tolist()
             # TODO: Some genes are at MAX, some are 0. We need a way to shake them up so that 
             # TODO:     1. the overall change is near 0
             # TODO:     2. each gene changes by maximum 1
@@ -63,16 +107,9 @@ class Chromosome:
         return "{} [{:.2f}]".format(tuple(self.gene), self.get_score())
 
     def update_pattern(self):
-        self.pattern = min(
-            compute_pattern(
-                N=self.N,
-                k=self.K,
-                weights=self.get_weights(),
-                degrees=self.NULL_DEGREES,
-                use_absolute_value=False
-            ),
-            key=abs
-        )
+        patterns = self.STEERING @ np.array(self.get_weights())
+        select = np.argmax if self.ROBUST else np.argmin
+        self.pattern = complex(patterns[select(np.abs(patterns))])
 
     def get_score(self):
         """Evaluates a score based on chromosome's pattern"""
@@ -85,11 +122,17 @@ class Chromosome:
         weights = [complex(cos(theta), sin(theta)) for theta in angles]
         return weights
 
-    def mutate(self):
-        for ii in range(self.N):
-            if random() <= self.MUTATION_FACTOR:
-                self.gene[ii] = Chromosome.new_gene()
-        self.update_pattern()
+    def mutate(self, mask=None, new_genes=None, update=True):
+        """Replaces the genes selected by mask with new_genes. Both are drawn here if not given,
+        so that GeneticAlgorithm can draw them for the whole sample at once. GeneticAlgorithm
+        also passes update=False, since organize_sample re-scores the whole sample in one batch."""
+        if mask is None:
+            mask = self.RNG.random(self.N) <= self.MUTATION_FACTOR
+        if new_genes is None:
+            new_genes = self.new_gene(self.N)
+        self.gene = np.where(mask, new_genes, self.gene).tolist()
+        if update:
+            self.update_pattern()
 
 
 class GeneticAlgorithm(BaseAlgorithm):
@@ -98,9 +141,10 @@ class GeneticAlgorithm(BaseAlgorithm):
     """
 
     chromosomes: List[Chromosome]
+    chromosome_class = Chromosome
 
-    def __init__(self, options):
-        super().__init__(options)
+    def __init__(self, options, rng=None):
+        super().__init__(options, rng)
         self.main_ang = options.main_ang
         self.sample_size = options.sample_size
         self.null_degrees = options.null_degrees
@@ -108,14 +152,36 @@ class GeneticAlgorithm(BaseAlgorithm):
         self.bit_resolution = options.bit_resolution
         self.mutation_factor = options.mutation_factor
         self.overwrite_mutations = options.overwrite_mutations
+        self.precision = getattr(options, "precision", "double")  # double, single
+        self.verify_count = getattr(options, "verify_count", None) or max(2, self.sample_size // 10)
+        self.backend = make_backend(options)
 
-        Chromosome.init_consts(options)
+        # Chromosome constants (RNG, steering, ...) are class attributes, so every solver binds
+        # its own subclass; otherwise coexisting solvers would overwrite each other's constants.
+        self.chromosome_class = type(self.chromosome_class.__name__, (self.chromosome_class,), {})
+        self.chromosome_class.init_consts(options, self.rng)
 
-        self.stop_criterion = options.stop_criterion  # time, target, iter
+        self.stop_criterion = options.stop_criterion  # time, target, iter, stagnation
         self.gen_to_repeat = options.gen_to_repeat
         self.time_limit = options.time_limit
         self.stop_after_score = options.stop_after_score
         self.max_time_limit = 20 * 1000
+        self.track_time_limit = getattr(options, "track_time_limit", None) or self.time_limit / 10
+        self.track_generations = getattr(options, "track_generations", None)
+
+        self.base_mutation_factor = self.mutation_factor
+        self.adaptive_mutation = getattr(options, "adaptive_mutation", False)
+        self.max_mutation_scale = getattr(options, "max_mutation_scale", 4.0)
+        self.max_restarts = getattr(options, "max_restarts", 0)
+        self.restart_elite = getattr(options, "restart_elite", 0.1)
+        self.restarts = 0
+        self.robust_top_k = getattr(options, "robust_top_k", 0)
+        self.convergence = ConvergenceTracker(
+            self.chromosome_class.gene_embedding(),
+            window=getattr(options, "stagnation_window", 20),
+            min_improvement=getattr(options, "stagnation_min_improvement", 0.1),
+            min_diversity=getattr(options, "min_diversity", 0.05),
+        )
 
         self.generations = 0
         self.chromosomes = []
@@ -125,7 +191,7 @@ class GeneticAlgorithm(BaseAlgorithm):
         self.buckets = None
         if options.use_buckets:
             self.bucket_count = options.bucket_count
-            self.buckets = []
+            self.buckets = BucketIndex(self.bucket_count)
             self.initialize_buckets()
 
         self.check_parameters()
@@ -135,19 +201,64 @@ class GeneticAlgorithm(BaseAlgorithm):
         if self.buckets is not None:
             assert len(self.null_degrees) == 1
             assert self.bucket_count & 1 == 0
-        assert self.stop_criterion in ["time", "target", "iter"]
+        assert self.stop_criterion in ["time", "target", "iter", "stagnation"]
+        complex_dtype(self.precision)
 
     def solve(self):
+        self.chromosome_class.set_null_degrees(self.null_degrees)
         self.initialize_sample()
         self.organize_sample()
+        self.reset_convergence()
         solve_function = getattr(self, "solve_" + self.stop_criterion)
         solve_function()
+        return self.result()
+
+    def resolve(self, time_budget=None):
+        """Re-scores the current population for the new null degrees and evolves it for
+        track_generations generations if that option is set, otherwise for time_budget
+        milliseconds (track_time_limit by default)."""
+        if len(self.chromosomes) == 0:
+            return self.solve()
+        self.chromosome_class.set_null_degrees(self.null_degrees)
+        self.organize_sample()
+        self.reset_convergence()
+
+        if self.track_generations is not None:
+            for generation in range(self.track_generations):
+                self.step()
+        else:
+            time_budget = self.track_time_limit if time_budget is None else time_budget
+            start_time = time_ns()
+            while (time_ns() - start_time) // 10**6 < time_budget:
+                self.step()
+        return self.result()
+
+    def result(self):
+        """Returns what solve and resolve return: the weights and score of the best chromosome
+        (the most robust of the best robust_top_k, if set) and the number of generations."""
+        if self.robust_top_k > 0:
+            ranked = [chromosome for chromosome, _ in self.rank_by_robustness(self.robust_top_k)]
+            self.chromosomes[:len(ranked)] = ranked
         return (
             self.chromosomes[0].get_weights(),
             self.chromosomes[0].get_score(),
             self.generations
         )
 
+    def rank_by_robustness(self, top_k, analysis=None):
+        """Re-ranks the best top_k chromosomes by their Monte Carlo robust score (see
+        utils.robustness) at the current null degrees, using the mc_* options unless an
+        analysis is given.
+        Returns a list of (chromosome, robust score) pairs, most robust first."""
+        if analysis is None:
+            analysis = MonteCarloRobustness.from_options(
+                self.options, rng=self.rng, backend=self.backend, null_degrees=self.null_degrees
+            )
+        top = self.chromosomes[:top_k]
+        scores = analysis.robust_scores([x.get_weights() for x in top])
+        order = np.argsort(-scores, kind="stable")
+        return [(top[idx], float(scores[idx])) for idx in order]
+
     def solve_time(self):
         start_time = time_ns()
         while (time_ns() - start_time) // 10**6 <= self.time_limit:
@@ -164,80 +275,144 @@ class GeneticAlgorithm(BaseAlgorithm):
         for generation in range(self.gen_to_repeat):
             self.step()
 
+    def solve_stagnation(self):
+        """Stops once the best score has not improved by stagnation_min_improvement over the last
+        stagnation_window generations (a quarter of them once the sample's diversity is below
+        min_diversity), and no restarts are left."""
+        start_time = time_ns()
+        while (time_ns() - start_time) // 10**6 <= self.max_time_limit:
+            self.step()
+            if self.convergence.stagnated():
+                break
+
     def step(self):
         self.create_children()
         self.mutate_sample()
         self.organize_sample()
         self.generations += 1
 
+        self.update_convergence()
+        if self.adaptive_mutation:
+            self.adapt_mutation_factor()
+        if self.convergence.stagnated() and self.restarts < self.max_restarts:
+            self.restart_sample()
+
+    def reset_convergence(self):
+        self.restarts = 0
+        self.mutation_factor = self.base_mutation_factor
+        self.convergence.reset()
+        self.update_convergence()
+
+    def update_convergence(self):
+        """Feeds the best score and the genes of the sample to the convergence tracker."""
+        self.convergence.update(self.chromosomes[0].get_score(), [x.gene for x in self.chromosomes])
+
+    def adapt_mutation_factor(self):
+        """Scales the mutation factor up (to max_mutation_scale times the base) while the
+        sample's diversity is below min_diversity, and back to the base otherwise."""
+        diversity = max(self.convergence.diversity, 1e-9)
+        scale = min(self.max_mutation_scale, max(1.0, self.convergence.min_diversity / diversity))
+        self.mutation_factor = min(1.0, self.base_mutation_factor * scale)
+
+    def restart_sample(self):
+        """Replaces everything but the best restart_elite fraction of the sample with random chromosomes."""
+        elite = max(1, int(len(self.chromosomes) * self.restart_elite))
+        for chromosome in self.chromosomes[elite:]:
+            chromosome.gene = self.chromosome_class.new_gene(self.N).tolist()
+        self.organize_sample()
+        self.restarts += 1
+        self.convergence.reset()
+        self.update_convergence()
+
     def create_children(self):
         """Using the better half of the population, creates children overwriting the bottom half by doing crossovers.
         If use_buckets is True, uses AM-GM–based crossover. Otherwise, it uses the basic merger crossover."""
 
-        for child in range(self.sample_size // 2, self.sample_size - 1, 2):
-            if self.buckets is None:
-                p1, p2 = sample(range(self.sample_size // 2), 2)
-                self.crossover(p1, p2, child, child + 1)
-            else:
-                bucket_idx = randrange(self.bucket_count)
-                while len(self.buckets[bucket_idx]) == 0:
-                    bucket_idx = (bucket_idx + 1) % self.bucket_count
-
-                bucket_opp = (bucket_idx + self.bucket_count//2) % self.bucket_count
-                p1 = choice(self.buckets[bucket_idx])
-                p2 = min(
-                    self.buckets[bucket_opp],
-                    key=lambda x: abs(x.pattern + p1.pattern)
-                ) if len(self.buckets[bucket_opp]) > 0 else choice(self.chromosomes)
-                self.crossover_bucket(p1, p2, child, child + 1)
+        children = range(self.sample_size // 2, self.sample_size - 1, 2)
+        if self.buckets is None:
+            # Two distinct parents from the better half and a crossover mask for every child pair
+            first = self.rng.integers(0, self.sample_size // 2, size=len(children))
+            second = self.rng.integers(0, self.sample_size // 2 - 1, size=len(children))
+            second += second >= first
+            masks = self.rng.random((len(children), self.N)) >= 0.5
+            for child, p1, p2, mask in zip(children, first, second, masks):
+                self.crossover(p1, p2, child, child + 1, mask)
+            return
+
+        # Pick a random non-empty bucket and a random member of it for every child pair,
+        # then look up all the best-cancelling partners in one batch.
+        sizes = self.buckets.sizes()
+        non_empty = np.nonzero(sizes)[0]
+        next_non_empty = non_empty[np.searchsorted(non_empty, np.arange(self.bucket_count)) % len(non_empty)]
+        bucket_idx = next_non_empty[self.rng.integers(0, self.bucket_count, size=len(children))]
+        first = self.buckets.sample_members(bucket_idx, self.rng.random(len(children)))
+        second = self.buckets.best_partners(self.buckets.patterns[first])
+        fallback = self.rng.integers(0, len(self.chromosomes), size=len(children))
+        second = np.where(second >= 0, second, fallback)
+
+        parents = list(self.chromosomes)
+        for child, p1, p2 in zip(children, first, second):
+            self.crossover_bucket(parents[p1], parents[p2], child, child + 1)
 
     def organize_sample(self):
         """Reorganizes the sample by removing repeated chromosomes and sorting them by their scores.
         Optionally, if use_buckets is True, allocates each chromosome to its respective bucket."""
 
         # Remove redundant chromosomes
-        hash_list = []
+        hash_set = set()
         for chromosome in self.chromosomes:
             this_hash = hash(chromosome)
-            if this_hash in hash_list:
-                chromosome = Chromosome()
+            if this_hash in hash_set:
+                chromosome = self.chromosome_class()
             else:
-                hash_list.append(this_hash)
-
-        # Sort sample by chromosome score
-        self.chromosomes.sort(key=lambda x: x.get_score(), reverse=True)
+                hash_set.add(this_hash)
+
+        # Sort sample by chromosome score, evaluating the whole sample in self.precision
+        genes = [x.gene for x in self.chromosomes]
+        patterns = self.chromosome_class.batch_patterns(genes, self.precision, self.backend)
+        for chromosome, pattern in zip(self.chromosomes, patterns):
+            chromosome.pattern = complex(pattern)
+        order = np.argsort(self.chromosome_class.rank_values(genes, patterns), kind="stable")
+        self.chromosomes = [self.chromosomes[idx] for idx in order]
+
+        if self.precision != "double":
+            # Re-verify the top candidates in double precision so that their order is exact
+            top = self.chromosomes[:self.verify_count]
+            top.sort(key=lambda x: x.get_score(), reverse=True)
+            self.chromosomes[:self.verify_count] = top
 
         # Allocate chromosomes to their respective buckets
         if self.buckets is not None:
-            self.initialize_buckets()
-            for chromosome in self.chromosomes:
-                bucket_idx = int(((phase(chromosome.pattern) + pi) / (2 * pi)) * self.bucket_count) % self.bucket_count
-                self.buckets[bucket_idx].append(chromosome)
+            self.buckets.build([chromosome.pattern for chromosome in self.chromosomes])
 
     def mutate_sample(self):
         """Mutates the sample excluding the best chromosome.
-        Overwrites the previous chromosomes if overwrite_mutations is True."""
+        Overwrites the previous chromosomes if overwrite_mutations is True.
+        The patterns are left stale until organize_sample re-scores the sample."""
+
+        count = len(self.chromosomes) - 1 if self.overwrite_mutations else self.sample_size
+        masks = self.rng.random((count, self.N)) <= self.mutation_factor
+        new_genes = self.chromosome_class.new_gene((count, self.N))
 
         if self.overwrite_mutations:
-            for chromosome in self.chromosomes[1:]:
-                chromosome.mutate()
+            for chromosome, mask, genes in zip(self.chromosomes[1:], masks, new_genes):
+                chromosome.mutate(mask, genes, update=False)
         else:
             for idx, original in enumerate(self.chromosomes[1:self.sample_size + 1]):
                 mutated = self.chromosomes[idx + self.sample_size - 1]
                 mutated.gene = original.gene.copy()
-                mutated.mutate()
+                mutated.mutate(masks[idx], new_genes[idx], update=False)
 
-    def crossover(self, p1, p2, c1, c2):
-        """Merges two parents' genes to create two children"""
+    def crossover(self, p1, p2, c1, c2, mask=None):
+        """Merges two parents' genes to create two children.
+        The genes selected by mask are swapped between the children."""
 
-        self.chromosomes[c1].gene = self.chromosomes[p1].gene.copy()
-        self.chromosomes[c2].gene = self.chromosomes[p2].gene.copy()
-        for i in range(self.N):
-            if random() >= 0.5:
-                self.chromosomes[c1].gene[i], self.chromosomes[c2].gene[i] = (
-                    self.chromosomes[c1].gene[i],
-                    self.chromosomes[c2].gene[i],
-                )
+        if mask is None:
+            mask = self.rng.random(self.N) >= 0.5
+        gene1 = np.array(self.chromosomes[p1].gene)
+        gene2 = np.array(self.chromosomes[p2].gene)
+        self.chromosomes[c1].gene = np.where(mask, gene2, gene1).tolist()
+        self.chromosomes[c2].gene = np.where(mask, gene1, gene2).tolist()
 
     def crossover_bucket(self, p1, p2, c1, c2):
         """Creates two children from parents' genes using the AM-GM approximation"""
@@ -253,11 +428,11 @@ class GeneticAlgorithm(BaseAlgorithm):
         self.chromosomes.clear()
         if self.overwrite_mutations:
             self.chromosomes = [
-                Chromosome() for _ in range(self.sample_size)
+                self.chromosome_class() for _ in range(self.sample_size)
             ]
         else:
             self.chromosomes = [
-                Chromosome() for _ in range(self.sample_size * 2 - 1)
+                self.chromosome_class() for _ in range(self.sample_size * 2 - 1)
             ]
 
         if self.buckets is not None:
@@ -265,4 +440,3 @@ class GeneticAlgorithm(BaseAlgorithm):
 
     def initialize_buckets(self):
         self.buckets.clear()
-        self.buckets = [[] for _ in range(self.bucket_count)]
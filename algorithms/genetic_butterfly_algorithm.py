@@ -1,10 +1,8 @@
-from random import randrange, random, choice, sample
 from cmath import exp, phase
 from math import log10, pi, nan, cos, sin
 
-from utils.pattern import compute_pattern, compute_single_pattern
 
-from .genetic_algorithm import GeneticAlgorithm, Chromosome
+from .genetic_algorithm import GeneticAlgorithm
 from .butterfly_algorithm import ButterflyAlgorithm
 
 
@@ -14,23 +12,26 @@ class GeneticWithButterflyAlgorithm(GeneticAlgorithm):
     chromosome, from which the entire population is created.
     """
 
-    def __init__(self, options):
-        super().__init__(options)
-        butterfly_alg = ButterflyAlgorithm(options)
-        weights, score = butterfly_alg.solve()
-        self.base_weights = [x for x in weights]
-        pass
+    def __init__(self, options, rng=None):
+        super().__init__(options, rng)
+        self.butterfly_alg = ButterflyAlgorithm(options, self.rng)
+        self.base_weights = None
 
     def initialize_sample(self):
+        # The base chromosome is solved for the current null degrees, so one instance can solve many
+        self.butterfly_alg.null_degrees = self.null_degrees
+        weights, score = self.butterfly_alg.solve()
+        self.base_weights = [x for x in weights]
+
         self.generations = 0
         self.chromosomes.clear()
         if self.overwrite_mutations:
-            self.chromosomes = [Chromosome(self.base_weights, shufflize=False)] + [
-                Chromosome(self.base_weights) for _ in range(self.sample_size - 1)
+            self.chromosomes = [self.chromosome_class(self.base_weights, shufflize=False)] + [
+                self.chromosome_class(self.base_weights) for _ in range(self.sample_size - 1)
             ]
         else:
-            self.chromosomes = [Chromosome(self.base_weights, shufflize=False)] + [
-                Chromosome(self.base_weights) for _ in range(self.sample_size * 2 - 2)
+            self.chromosomes = [self.chromosome_class(self.base_weights, shufflize=False)] + [
+                self.chromosome_class(self.base_weights) for _ in range(self.sample_size * 2 - 2)
             ]
 
         if self.buckets is not None:
@@ -0,0 +1,140 @@
+import numpy as np
+
+from utils.pattern import steering_matrix, as_degree_array, range_in_deg
+from utils.pareto import non_dominated_sort, crowding_distance
+
+from .genetic_algorithm import GeneticAlgorithm
+
+
+class ParetoGeneticAlgorithm(GeneticAlgorithm):
+    """ Finds nulls by running a multi-objective genetic algorithm that
+    trades off null depth, main-lobe gain at main_ang and peak sidelobe
+    level. The sample is ordered NSGA-II style (by front, then by crowding
+    distance), and the Pareto front is returned instead of one chromosome.
+
+    Selection is (mu + lambda): the first sample_size chromosomes are the
+    parents, every generation writes sample_size offspring after them, and
+    organize_sample keeps the best sample_size of both as the next parents,
+    so the front is never overwritten by mutations.
+    """
+
+    OBJECTIVES = ["null_depth_db", "main_gain_db", "sidelobe_db"]
+
+    def __init__(self, options, rng=None):
+        super().__init__(options, rng)
+        self.mainlobe_width = getattr(options, "mainlobe_width", 10.0)  # degrees, excluded from sidelobes
+        self.sidelobe_res = getattr(options, "sidelobe_res", 1.0)
+        self.objectives = None
+        self.ranks = None
+
+        # The main lobe direction and the sidelobe region, in one steering matrix
+        main = as_degree_array([self.main_ang])
+        main_az = main[0] if main.ndim == 1 else main[0, 0]
+        grid = np.array(range_in_deg(self.sidelobe_res))
+        sidelobes = grid[np.abs(grid - main_az) > self.mainlobe_width / 2]
+        self.pattern_steering = steering_matrix(
+            N=self.N, k=self.k, degrees=[self.main_ang] + sidelobes.tolist(),
+            positions=getattr(options, "positions", None),
+        )
+
+    def check_parameters(self):
+        super().check_parameters()
+        assert self.stop_criterion != "target", \
+            "the Pareto front has no single score to stop at; use time or iter"
+
+    def result(self):
+        """Returns the weights and objective values (see OBJECTIVES) of the Pareto front, and the
+        number of generations, for both solve and resolve."""
+        if self.precision != "double":
+            # The returned front and its scores are evaluated in double precision
+            self.organize_sample(precision="double")
+
+        front = np.nonzero(self.ranks[:self.sample_size] == 0)[0]
+        return (
+            [self.chromosomes[idx].get_weights() for idx in front],
+            self.scores(self.objectives[front]),
+            self.generations
+        )
+
+    def scores(self, objectives):
+        """Converts minimized objectives back to (null depth, main gain, sidelobe level) in dB."""
+        return objectives * np.array([-1, -1, 1])
+
+    def evaluate_objectives(self, genes, null_patterns):
+        """Returns the minimized objectives (-null depth, -main gain, sidelobe level), all in dB,
+        for every row of genes, using one batched pattern evaluation."""
+        nulls = np.abs(null_patterns)
+        weights = self.chromosome_class.batch_weights(genes)
+        if self.backend is None:
+            patterns = np.abs(weights @ self.pattern_steering.T)
+        else:
+            patterns = np.abs(self.backend.project(weights, self.pattern_steering))
+
+        floor = 1e-15
+        return np.column_stack([
+            20 * np.log10(np.maximum(nulls, floor)),
+            -20 * np.log10(np.maximum(patterns[:, 0], floor)),
+            20 * np.log10(np.maximum(patterns[:, 1:].max(axis=1), floor)),
+        ])
+
+    def front_score(self):
+        """Returns the sum of the best null depth, main gain and (negated) sidelobe level on the
+        front, in dB. It only grows while any objective improves, so stagnation can track it."""
+        front = self.ranks[:self.sample_size] == 0
+        return float(-self.objectives[:self.sample_size][front].min(axis=0).sum())
+
+    def update_convergence(self):
+        self.convergence.update(self.front_score(), [x.gene for x in self.chromosomes[:self.sample_size]])
+
+    def initialize_sample(self):
+        """Creates sample_size parents and as many offspring slots, all random."""
+        self.generations = 0
+        self.chromosomes = [self.chromosome_class() for _ in range(2 * self.sample_size)]
+        if self.buckets is not None:
+            self.initialize_buckets()
+
+    def create_children(self):
+        """Writes the crossovers of parents picked by binary tournament into the offspring slots.
+        The parents are sorted, so the lower index of two random parents wins the tournament.
+        If use_buckets is True, the second parent is the best-cancelling one instead."""
+        children = range(self.sample_size, 2 * self.sample_size - 1, 2)
+        first, second = self.rng.integers(0, self.sample_size, size=(2, len(children), 2)).min(axis=2)
+        if self.buckets is None:
+            masks = self.rng.random((len(children), self.N)) >= 0.5
+            for child, p1, p2, mask in zip(children, first, second, masks):
+                self.crossover(p1, p2, child, child + 1, mask)
+            return
+
+        partners = self.buckets.best_partners(self.buckets.patterns[first])
+        second = np.where(partners >= 0, partners, second)
+        for child, p1, p2 in zip(children, first, second):
+            self.crossover_bucket(self.chromosomes[p1], self.chromosomes[p2], child, child + 1)
+
+    def mutate_sample(self):
+        """Mutates the offspring only; the parents are kept as they are."""
+        offspring = self.chromosomes[self.sample_size:]
+        masks = self.rng.random((len(offspring), self.N)) <= self.mutation_factor
+        new_genes = self.chromosome_class.new_gene((len(offspring), self.N))
+        for chromosome, mask, genes in zip(offspring, masks, new_genes):
+            chromosome.mutate(mask, genes, update=False)
+
+    def organize_sample(self, precision=None):
+        """Orders parents and offspring together by Pareto front, then by decreasing crowding
+        distance, so the first sample_size chromosomes are the next parents."""
+        genes = [x.gene for x in self.chromosomes]
+        precision = self.precision if precision is None else precision
+        null_patterns = self.chromosome_class.batch_patterns(genes, precision, self.backend)
+        for chromosome, pattern in zip(self.chromosomes, null_patterns):
+            chromosome.pattern = complex(pattern)
+        objectives = self.evaluate_objectives(genes, null_patterns)
+        ranks = non_dominated_sort(objectives)
+        crowding = crowding_distance(objectives, ranks)
+
+        order = np.lexsort((-crowding, ranks))
+        self.chromosomes = [self.chromosomes[idx] for idx in order]
+        self.objectives = objectives[order]
+        self.ranks = ranks[order]
+
+        if self.buckets is not None:
+            # Only the parents are indexed, so crossover partners never alias an offspring slot
+            self.buckets.build([chromosome.pattern for chromosome in self.chromosomes[:self.sample_size]])
@@ -0,0 +1,176 @@
+import hashlib
+import os
+from copy import copy
+from math import log10
+
+import numpy as np
+
+from utils.robust_null import SteeringCache
+from utils.converter import weights_to_codes, codes_to_weights, code_to_phase, phase_to_code
+from utils.solution_store import SolutionStore
+
+from .base_algorithm import BaseAlgorithm
+from .butterfly_algorithm import ButterflyAlgorithm
+from .cpx_lstsq_algorithm import CpxLstsqAlgorithm
+from .genetic_algorithm import GeneticAlgorithm
+from .genetic_butterfly_algorithm import GeneticWithButterflyAlgorithm
+
+
+class SolutionTableAlgorithm(BaseAlgorithm):
+    """ Finds nulls by looking up phase codes precomputed for a grid
+    of null angles. Angles that the table does not cover are solved
+    by another algorithm and added to the table.
+    """
+
+    SOLVERS = {
+        "butterfly": ButterflyAlgorithm,
+        "cpx_lstsq": CpxLstsqAlgorithm,
+        "genetic": GeneticAlgorithm,
+        "genetic_butterfly": GeneticWithButterflyAlgorithm,
+    }
+
+    def __init__(self, options, rng=None):
+        super().__init__(options, rng)
+        self.main_ang = options.main_ang
+        self.null_degrees = options.null_degrees
+        self.bit_count = options.bit_count
+        self.bit_resolution = options.bit_resolution
+        self.positions = getattr(options, "positions", None)
+        self.objective = getattr(options, "objective", "nominal")
+
+        self.solver_name = getattr(options, "store_solver", "butterfly")
+        self.lookup = getattr(options, "store_lookup", "nearest")  # nearest, interpolate
+        # degrees: the distance to the nearest stored angle, or the width of the bracketing pair
+        self.tolerance = getattr(options, "store_tolerance", None)
+        if self.tolerance is None:
+            self.tolerance = 0.05 if self.lookup == "nearest" else 1.0
+        self.flush_every = getattr(options, "store_flush_every", 1)  # misses between saves
+        self.store_dir = getattr(options, "store_dir", "solutions")
+        self.steering_cache = SteeringCache(options)
+
+        self.check_parameters()
+        self.store = SolutionStore(self.store_path(), self.N)
+
+    def check_parameters(self):
+        super().check_parameters()
+        assert self.solver_name in self.SOLVERS, \
+            "store_solver should be one of {}".format(list(self.SOLVERS))
+        assert self.lookup in ["nearest", "interpolate"]
+        assert self.tolerance >= 0
+        assert self.flush_every >= 1
+
+    def store_path(self):
+        """Each (main_ang, N, k, bit_count, bit_resolution, positions, objective) gets its own table.
+        Custom positions are keyed by a digest, and the robust objective by its parameters."""
+        # (azimuth, elevation) main angles are keyed by both components
+        main = "_".join("{:g}".format(x) for x in np.atleast_1d(self.main_ang))
+        name = "N{}_k{:g}_main{}_b{}_r{}".format(
+            self.N, self.k, main, self.bit_count, self.bit_resolution
+        )
+        if self.positions is not None:
+            digest = hashlib.sha1(np.asarray(self.positions, dtype=float).tobytes()).hexdigest()
+            name += "_pos" + digest[:12]
+        if self.objective == "robust":
+            name += "_robust_bw{:g}_f{}_s{:g}_p{}".format(
+                getattr(self.options, "robust_bandwidth", 0.0),
+                getattr(self.options, "robust_freq_points", 3),
+                getattr(self.options, "robust_span", 0.0),
+                getattr(self.options, "robust_span_points", 1),
+            )
+        return os.path.join(self.store_dir, name + ".npy")
+
+    def precompute(self, null_grid):
+        """Solves every angle of the grid that is not in the table yet and saves the table."""
+        for angle in null_grid:
+            idx = self.store.nearest(angle)
+            if idx is not None and self.store.record(idx)[0] == angle:
+                continue
+            code, score = self.run_solver(angle)
+            self.store.insert(angle, code, score)
+        self.store.save()
+
+    def solve(self):
+        if len(self.null_degrees) != 1 or isinstance(self.null_degrees[0], (list, tuple)):
+            # Tables are indexed by a single null angle; solve anything else directly.
+            options = copy(self.options)
+            options.null_degrees = list(self.null_degrees)
+            weights = self.SOLVERS[self.solver_name](options, self.rng).solve()
+            weights = weights[0] if isinstance(weights, tuple) else weights
+            code = weights_to_codes(weights, self.bit_count, self.bit_resolution)
+        else:
+            angle = self.null_degrees[0]
+            code = self.query(angle)
+            if code is None:
+                code, score = self.run_solver(angle)
+                self.store.insert(angle, code, score)
+                if self.store.pending >= self.flush_every:
+                    self.store.save()
+
+        self.final_weights = codes_to_weights(code, self.bit_count, self.bit_resolution)
+        return (
+            self.final_weights,
+            self.get_score(self.final_weights, self.null_degrees)
+        )
+
+    def flush(self):
+        """Saves the solutions inserted since the last save."""
+        self.store.save()
+
+    def query(self, angle):
+        """Returns the stored code for the angle, or None on a miss. A nearest lookup hits if a
+        stored angle is within tolerance; an interpolated lookup hits if the stored angles
+        around the angle are at most tolerance apart (or one of them is the angle itself)."""
+        idx = self.store.nearest(angle)
+        if idx is None:
+            return None
+        near_angle, _, near_code = self.store.record(idx)
+        if self.lookup == "nearest" or near_angle == angle:
+            return near_code if abs(near_angle - angle) <= self.tolerance else None
+
+        lo, hi = self.store.bracket(angle)
+        if lo is None or hi is None:
+            return None
+        lo_record, hi_record = self.store.record(lo), self.store.record(hi)
+        if hi_record[0] - lo_record[0] > self.tolerance:
+            return None
+        interp_code = self.interpolate(angle, lo_record, hi_record)
+        if self.get_score(codes_to_weights(interp_code, self.bit_count, self.bit_resolution), [angle]) > \
+                self.get_score(codes_to_weights(near_code, self.bit_count, self.bit_resolution), [angle]):
+            return interp_code
+        return near_code
+
+    def interpolate(self, angle, lo_record, hi_record):
+        """Linearly interpolates the phases of two stored solutions and quantizes the result."""
+        lo_angle, _, lo_code = lo_record
+        hi_angle, _, hi_code = hi_record
+        t = (angle - lo_angle) / (hi_angle - lo_angle) if hi_angle != lo_angle else 0
+        phases = [
+            (1 - t) * code_to_phase(a, self.bit_count, self.bit_resolution)
+            + t * code_to_phase(b, self.bit_count, self.bit_resolution)
+            for a, b in zip(lo_code, hi_code)
+        ]
+        max_code = 2**self.bit_count - 1
+        return [
+            min(max(phase_to_code(x, self.bit_count, self.bit_resolution), 0), max_code)
+            for x in phases
+        ]
+
+    def run_solver(self, angle):
+        """Runs the fallback solver for a single null angle and returns its (code, score)."""
+        options = copy(self.options)
+        options.null_degrees = [angle]
+        weights = self.SOLVERS[self.solver_name](options, self.rng).solve()
+        weights = weights[0] if isinstance(weights, tuple) else weights
+
+        max_code = 2**self.bit_count - 1
+        code = [
+            min(max(c, 0), max_code)
+            for c in weights_to_codes(weights, self.bit_count, self.bit_resolution)
+        ]
+        score = self.get_score(codes_to_weights(code, self.bit_count, self.bit_resolution), [angle])
+        return code, score
+
+    def get_score(self, weights, null_degrees):
+        """Returns the depth (in dB) of the shallowest null, under the table's objective."""
+        pattern = self.steering_cache(null_degrees) @ weights
+        return -20 * log10(max(abs(pattern)))
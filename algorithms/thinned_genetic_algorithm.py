@@ -0,0 +1,99 @@
+from math import log10
+
+import numpy as np
+
+from utils.pattern import steering_matrix
+
+from .genetic_algorithm import GeneticAlgorithm, Chromosome
+
+
+class ThinnedChromosome(Chromosome):
+    """A chromosome whose genes can also switch an element off.
+
+    Gene values 0 .. 2**BIT_COUNT-1 are phase codes as in Chromosome, and the extra value
+    OFF = 2**BIT_COUNT turns the element off, so crossover and mutation handle the on/off
+    mask and the phases together. Genes with fewer than MIN_ACTIVE elements on, or with a
+    main-lobe gain below MIN_MAIN_GAIN, are infeasible and rank below every feasible gene.
+    """
+
+    @classmethod
+    def init_consts(cls, options, rng):
+        super().init_consts(options, rng)
+        cls.OFF = 2**cls.BIT_COUNT
+        cls.OFF_PROBABILITY = getattr(options, "off_probability", 0.1)
+        cls.MIN_ACTIVE = getattr(options, "min_active", None) or cls.N // 2
+        # Minimum |AF(main_ang)|, relative to the full array (all on, in phase) in dB
+        cls.MIN_MAIN_GAIN = cls.N * 10 ** (getattr(options, "min_main_gain_db", -3.0) / 20)
+        cls.MAIN_STEERING = steering_matrix(
+            N=cls.N, k=cls.K, degrees=[options.main_ang], positions=getattr(options, "positions", None)
+        )[0]
+
+    @classmethod
+    def new_gene(cls, size=None):
+        codes = cls.RNG.integers(0, 2**cls.BIT_COUNT, size=size)
+        return np.where(cls.RNG.random(size) < cls.OFF_PROBABILITY, cls.OFF, codes)
+
+    @classmethod
+    def gene_embedding(cls):
+        """Places OFF on its own axis, at the same distance from every phase code."""
+        on = np.column_stack([super().gene_embedding(), np.zeros(cls.OFF)])
+        return np.vstack([on, [0, 0, 1]])
+
+    @classmethod
+    def batch_weights(cls, genes):
+        genes = np.asarray(genes)
+        return np.where(genes == cls.OFF, 0, super().batch_weights(genes))
+
+    @classmethod
+    def violations(cls, genes):
+        """Returns how far each row of genes is from meeting the constraints (0 if feasible)."""
+        genes = np.atleast_2d(genes)
+        active = np.sum(genes != cls.OFF, axis=1)
+        gain = np.abs(cls.batch_weights(genes) @ cls.MAIN_STEERING)
+        return (
+            np.maximum(0, cls.MIN_ACTIVE - active) / cls.N
+            + np.maximum(0, cls.MIN_MAIN_GAIN - gain) / cls.N
+        )
+
+    @classmethod
+    def rank_values(cls, genes, patterns):
+        violations = cls.violations(genes)
+        return np.where(violations > 0, cls.N + 1 + violations, np.abs(patterns))
+
+    def get_weights(self):
+        """Returns e^{iθ} value for a chromosome's θs, and 0 for the elements that are off"""
+        return [complex(x) for x in self.batch_weights(self.gene)]
+
+    def get_score(self):
+        """Evaluates a score based on chromosome's pattern; infeasible genes get a negative score"""
+        self.update_pattern()
+        return -20 * log10(self.rank_values([self.gene], [self.pattern])[0])
+
+    def power_saved(self):
+        """Returns the fraction of elements that are switched off"""
+        return sum(x == self.OFF for x in self.gene) / self.N
+
+
+class ThinnedGeneticAlgorithm(GeneticAlgorithm):
+    """ Finds nulls by running a genetic algorithm over the phase codes
+    and on/off state of every element (a thinned array), subject to a
+    minimum number of active elements and a minimum main-lobe gain.
+    """
+
+    chromosome_class = ThinnedChromosome
+
+    def check_parameters(self):
+        super().check_parameters()
+        assert self.buckets is None, "AM-GM crossover cannot average on/off genes"
+        assert 0 < self.chromosome_class.MIN_ACTIVE <= self.N
+
+    def result(self):
+        """Returns the weights (0 for elements that are off), the score, the number of
+        generations and the fraction of elements switched off (power saved)."""
+        weights, score, generations = super().result()
+        return (
+            weights,
+            score,
+            generations,
+            self.chromosomes[0].power_saved()
+        )
@@ -24,6 +24,7 @@ class BaseOptions():
         parser.add_argument('--ang_offset', type=int, default=0, help='angle offset after calibration')
         parser.add_argument('--comp_file', type=str, default='all_one', help='filepath containing temporal compensation vectors')
         parser.add_argument('--main_ang', type=float, default=90, help='mainlobe angle in degrees')
+        parser.add_argument('--seed', type=int, default=None, help='seed for the random number generators of the algorithms')
         parser.add_argument('--plot_results', type=bool, default=False, help='whether or not to plot the results')
 
         parser.add_argument('--signal', type=float, default=1.0, help='signal power (normalized)')
@@ -34,6 +35,57 @@ class BaseOptions():
         parser.add_argument('--interference_file', type=str, default='all_zero', help='filepath containing interference information')
         parser.add_argument('--null_degs_file', type=str, default='empty', help='filepath containing the null degrees (and weights)')
 
+        # null objective
+        parser.add_argument('--objective', type=str, default='nominal', help='null objective [nominal | robust]')
+        parser.add_argument('--robust_bandwidth', type=float, default=0.0, help='relative bandwidth around k covered by the robust objective')
+        parser.add_argument('--robust_freq_points', type=int, default=3, help='number of k values in the robust objective')
+        parser.add_argument('--robust_span', type=float, default=0.0, help='angular span (in degrees) around each null covered by the robust objective')
+        parser.add_argument('--robust_span_points', type=int, default=1, help='number of angles per null in the robust objective')
+
+        # precision
+        parser.add_argument('--precision', type=str, default='double', help='precision used to screen candidates [double | single]')
+        parser.add_argument('--verify_count', type=int, default=None, help='number of top candidates re-scored in double precision')
+
+        # convergence tracking
+        parser.add_argument('--stagnation_window', type=int, default=20, help='number of generations over which the best score improvement is measured')
+        parser.add_argument('--stagnation_min_improvement', type=float, default=0.1, help='minimum improvement (in dB) over the window before the sample counts as stagnated')
+        parser.add_argument('--min_diversity', type=float, default=0.05, help='gene diversity (1 for a random sample) below which the sample counts as converged and stagnates after a quarter of stagnation_window')
+        parser.add_argument('--adaptive_mutation', type=bool, default=False, help='whether to scale the mutation factor up while the diversity is low')
+        parser.add_argument('--max_mutation_scale', type=float, default=4.0, help='maximum scale of the adaptive mutation factor')
+        parser.add_argument('--max_restarts', type=int, default=0, help='number of partial restarts allowed when the sample stagnates')
+        parser.add_argument('--restart_elite', type=float, default=0.1, help='fraction of the sample kept on a partial restart')
+
+        # monte carlo robustness
+        parser.add_argument('--mc_samples', type=int, default=1000, help='number of perturbed arrays in the robustness analysis')
+        parser.add_argument('--mc_phase_error', type=float, default=0.0, help='std (in degrees) of the phase shifter error')
+        parser.add_argument('--mc_calibration_error', type=float, default=0.0, help='std (in degrees) of the calibration offsets')
+        parser.add_argument('--mc_failure_rate', type=float, default=0.0, help='probability that an antenna element fails')
+        parser.add_argument('--robust_top_k', type=int, default=0, help='if positive, the best robust_top_k chromosomes are re-ranked by their robust score')
+
+        # multi-objective (pareto) genetic algorithm
+        parser.add_argument('--mainlobe_width', type=float, default=10.0, help='width (in degrees) around main_ang excluded from the sidelobe level')
+        parser.add_argument('--sidelobe_res', type=float, default=1.0, help='resolution (in degrees) of the sidelobe level grid')
+
+        # thinned array genetic algorithm
+        parser.add_argument('--off_probability', type=float, default=0.1, help='probability that a new gene switches its element off')
+        parser.add_argument('--min_active', type=int, default=None, help='minimum number of active elements (default: N // 2)')
+        parser.add_argument('--min_main_gain_db', type=float, default=-3.0, help='minimum gain at main_ang, in dB relative to the full array')
+
+        # evaluation backend
+        parser.add_argument('--eval_threads', type=int, default=1, help='threads used to evaluate large samples and angle grids (1 disables the chunked backend)')
+        parser.add_argument('--eval_memory_limit', type=int, default=256, help='memory limit (in MB) for the temporary arrays of the chunked backend')
+
+        # tracking
+        parser.add_argument('--track_time_limit', type=float, default=None, help='time budget (in ms) for re-solving after each null degree update')
+        parser.add_argument('--track_generations', type=int, default=None, help='number of generations the genetic algorithms run after each null degree update, instead of the time budget')
+
+        # solution store
+        parser.add_argument('--store_dir', type=str, default='solutions', help='directory containing the precomputed solution tables')
+        parser.add_argument('--store_solver', type=str, default='butterfly', help='algorithm used to fill the solution table on a miss')
+        parser.add_argument('--store_lookup', type=str, default='nearest', help='how stored solutions are looked up [nearest | interpolate]')
+        parser.add_argument('--store_tolerance', type=float, default=None, help='nearest: max distance (in degrees) to a stored angle, default 0.05; interpolate: max distance between the two stored angles around it, default 1.0. Other angles fall back to the solver')
+        parser.add_argument('--store_flush_every', type=int, default=1, help='number of solutions added to the table between two saves of its file')
+
         self.initialized = True
         return parser
 
@@ -0,0 +1,46 @@
+import json
+import socket
+
+
+class NullingClient():
+    """A minimal blocking client for NullingService, speaking one JSON object per line."""
+
+    def __init__(self, host="127.0.0.1", port=8765, path=None, timeout=10.0):
+        if path is not None:
+            self.socket = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            self.socket.settimeout(timeout)
+            self.socket.connect(path)
+        else:
+            self.socket = socket.create_connection((host, port), timeout=timeout)
+        self.stream = self.socket.makefile("rwb")
+        self.next_id = 0
+
+    def request(self, message):
+        self.stream.write((json.dumps(message) + "\n").encode())
+        self.stream.flush()
+        line = self.stream.readline()
+        if not line:
+            raise ConnectionError("the nulling service closed the connection")
+        return json.loads(line)
+
+    def solve(self, null_degrees, alg="cpx_lstsq", **options):
+        """Returns (weights, score) for the given null degrees. Extra keyword arguments
+        (N, k, main_ang, bit_count, ...) override the service defaults for this request."""
+        self.next_id += 1
+        reply = self.request(dict(options, id=self.next_id, alg=alg, null_degrees=list(null_degrees)))
+        if "error" in reply:
+            raise RuntimeError(reply["error"])
+        return [complex(re, im) for re, im in reply["weights"]], reply["score"]
+
+    def metrics(self):
+        return self.request({"op": "metrics"})
+
+    def close(self):
+        self.stream.close()
+        self.socket.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
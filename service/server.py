@@ -0,0 +1,270 @@
+import argparse
+import asyncio
+import json
+from collections import deque
+from copy import copy
+from math import log10
+from time import perf_counter
+from types import SimpleNamespace
+
+import numpy as np
+
+from algorithms.butterfly_algorithm import ButterflyAlgorithm
+from algorithms.cpx_lstsq_algorithm import CpxLstsqAlgorithm
+from algorithms.genetic_algorithm import GeneticAlgorithm
+from algorithms.genetic_butterfly_algorithm import GeneticWithButterflyAlgorithm
+from algorithms.solution_table_algorithm import SolutionTableAlgorithm
+from utils.robust_null import SteeringCache
+from utils.rng import spawn_rngs
+
+
+DEFAULT_OPTIONS = dict(
+    N=16,
+    k=1.0,
+    main_ang=90.0,
+    bit_count=6,
+    bit_resolution=6,
+    sample_size=50,
+    mutation_factor=0.1,
+    cooking_factor=0.5,
+    overwrite_mutations=True,
+    stop_criterion="iter",
+    gen_to_repeat=50,
+    time_limit=100,
+    stop_after_score=60,
+    use_buckets=False,
+    bucket_count=8,
+    store_flush_every=64,  # the table solver saves its file every 64 misses, and on stop()
+    seed=None,
+)
+
+
+class ServiceMetrics():
+    """Keeps request counts, batch sizes and the latency of the most recent requests."""
+
+    def __init__(self, history=1000):
+        self.start_time = perf_counter()
+        self.requests = 0
+        self.errors = 0
+        self.batches = 0
+        self.latencies = deque(maxlen=history)
+
+    def record_batch(self):
+        self.batches += 1
+
+    def record_request(self, latency, failed=False):
+        self.requests += 1
+        self.errors += int(failed)
+        self.latencies.append(latency)
+
+    def summary(self):
+        uptime = perf_counter() - self.start_time
+        latencies = np.array(self.latencies) * 1000
+        percentiles = np.percentile(latencies, [50, 95, 99]).tolist() if len(latencies) else [None] * 3
+        return {
+            "requests": self.requests,
+            "errors": self.errors,
+            "batches": self.batches,
+            "mean_batch_size": self.requests / self.batches if self.batches else None,
+            "throughput_rps": self.requests / uptime if uptime > 0 else None,
+            "latency_ms_p50": percentiles[0],
+            "latency_ms_p95": percentiles[1],
+            "latency_ms_p99": percentiles[2],
+            "uptime_s": uptime,
+        }
+
+
+class NullingService():
+    """Answers nulling requests over a local socket, keeping the solvers warm between requests.
+
+    The protocol is one JSON object per line. A request looks like
+        {"id": 1, "alg": "cpx_lstsq", "null_degrees": [45, 60], "N": 16}
+    where every field but null_degrees is optional, and {"op": "metrics"} returns the metrics.
+    Requests arriving within batch_window seconds of each other are solved together: least
+    squares problems with the same shape share one stacked solve, the rest run one by one.
+    One solver instance and one steering cache are kept per set of options (all but the
+    null degrees), and every request only reassigns the solver's null_degrees.
+    """
+
+    SOLVERS = {
+        "butterfly": ButterflyAlgorithm,
+        "cpx_lstsq": CpxLstsqAlgorithm,
+        "genetic": GeneticAlgorithm,
+        "genetic_butterfly": GeneticWithButterflyAlgorithm,
+        "table": SolutionTableAlgorithm,
+    }
+
+    def __init__(self, options, batch_window=0.002, max_batch=64):
+        self.options = options
+        self.batch_window = batch_window
+        self.max_batch = max_batch
+        # Every solver instance gets its own child stream of this seed sequence
+        self.seed_sequence = np.random.SeedSequence(getattr(options, "seed", None))
+        self.metrics = ServiceMetrics()
+        self.solvers = {}
+        self.steering_caches = {}
+        self.queue = None
+        self.server = None
+
+    async def start(self, host="127.0.0.1", port=8765, path=None):
+        """Starts listening on a Unix socket if path is given, on host:port otherwise."""
+        self.queue = asyncio.Queue()
+        self.batcher = asyncio.ensure_future(self.run_batcher())
+        if path is not None:
+            self.server = await asyncio.start_unix_server(self.handle_client, path=path)
+        else:
+            self.server = await asyncio.start_server(self.handle_client, host=host, port=port)
+        return self.server
+
+    async def stop(self):
+        self.server.close()
+        await self.server.wait_closed()
+        self.batcher.cancel()
+        for solver in self.solvers.values():
+            if hasattr(solver, "flush"):
+                solver.flush()
+
+    async def handle_client(self, reader, writer):
+        while True:
+            line = await reader.readline()
+            if not line:
+                break
+            try:
+                request = json.loads(line)
+                if not isinstance(request, dict):
+                    raise ValueError("a request should be a JSON object")
+                if request.get("op") == "metrics":
+                    reply = self.metrics.summary()
+                else:
+                    future = asyncio.get_event_loop().create_future()
+                    await self.queue.put((request, future, perf_counter()))
+                    reply = await future
+            except ValueError as error:
+                reply = {"error": str(error)}
+            writer.write((json.dumps(reply) + "\n").encode())
+            await writer.drain()
+        writer.close()
+
+    async def run_batcher(self):
+        loop = asyncio.get_event_loop()
+        while True:
+            batch = [await self.queue.get()]
+            deadline = loop.time() + self.batch_window
+            while len(batch) < self.max_batch:
+                remaining = deadline - loop.time()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(self.queue.get(), remaining))
+                except asyncio.TimeoutError:
+                    break
+
+            replies = await loop.run_in_executor(None, self.solve_batch, [x[0] for x in batch])
+            self.metrics.record_batch()
+            for (request, future, start_time), reply in zip(batch, replies):
+                self.metrics.record_request(perf_counter() - start_time, "error" in reply)
+                future.set_result(reply)
+
+    def solve_batch(self, requests):
+        """Solves a list of requests and returns one reply per request."""
+        replies = [None] * len(requests)
+        groups = {}
+        for idx, request in enumerate(requests):
+            try:
+                options = self.request_options(request)
+                alg = request.get("alg", "cpx_lstsq")
+                assert alg in self.SOLVERS, "alg should be one of {}".format(list(self.SOLVERS))
+            except Exception as error:
+                replies[idx] = self.error_reply(request, error)
+                continue
+            key = (alg, options.N, options.k, options.main_ang, len(options.null_degrees))
+            groups.setdefault(key, []).append((idx, options))
+
+        for (alg, *_), members in groups.items():
+            try:
+                if alg == "cpx_lstsq":
+                    solver = self.solver(alg, members[0][1])
+                    all_weights = solver.solve_batch([options.null_degrees for _, options in members])
+                else:
+                    all_weights = [self.solve_one(alg, options) for _, options in members]
+                for (idx, options), weights in zip(members, all_weights):
+                    replies[idx] = self.reply(requests[idx], options, weights)
+            except Exception as error:
+                # Any failure is reported to this group only, so the batcher keeps running
+                for idx, _ in members:
+                    replies[idx] = self.error_reply(requests[idx], error)
+        return replies
+
+    def solve_one(self, alg, options):
+        solver = self.solver(alg, options)
+        solver.null_degrees = options.null_degrees
+        result = solver.solve()
+        return result[0] if isinstance(result, tuple) else result
+
+    def options_key(self, options):
+        """Returns a hashable key of every option but the null degrees."""
+        return tuple(sorted((k, repr(v)) for k, v in vars(options).items() if k != "null_degrees"))
+
+    def solver(self, alg, options):
+        """Returns the warm solver instance for alg and options, creating it on first use."""
+        key = (alg, self.options_key(options))
+        if key not in self.solvers:
+            self.solvers[key] = self.SOLVERS[alg](options, self.spawn_rng())
+        return self.solvers[key]
+
+    def steering(self, options):
+        """Returns the steering matrix of options.null_degrees, from the cache of its options."""
+        key = self.options_key(options)
+        if key not in self.steering_caches:
+            self.steering_caches[key] = SteeringCache(options)
+        return self.steering_caches[key](options.null_degrees)
+
+    def spawn_rng(self):
+        return spawn_rngs(self.seed_sequence, 1)[0]
+
+    def request_options(self, request):
+        options = copy(self.options)
+        for name in DEFAULT_OPTIONS:
+            if name in request and name != "seed":
+                setattr(options, name, type(getattr(options, name))(request[name]))
+        options.null_degrees = [
+            float(x) if np.ndim(x) == 0 else tuple(float(y) for y in x) for x in request["null_degrees"]
+        ]
+        return options
+
+    def reply(self, request, options, weights):
+        pattern = abs(self.steering(options) @ weights)
+        return {
+            "id": request.get("id"),
+            "weights": [[w.real, w.imag] for w in map(complex, weights)],
+            "score": -20 * log10(max(pattern)) if max(pattern) > 0 else None,
+        }
+
+    def error_reply(self, request, error):
+        return {"id": request.get("id"), "error": "{}: {}".format(type(error).__name__, error)}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Local nulling service")
+    parser.add_argument('--host', type=str, default='127.0.0.1', help='address to listen on')
+    parser.add_argument('--port', type=int, default=8765, help='port to listen on')
+    parser.add_argument('--path', type=str, default=None, help='Unix socket path (overrides host and port)')
+    parser.add_argument('--batch_window', type=float, default=0.002, help='seconds to wait for more requests to batch')
+    parser.add_argument('--max_batch', type=int, default=64, help='maximum number of requests per batch')
+    for name, default in DEFAULT_OPTIONS.items():
+        parser.add_argument('--' + name, type=type(default) if default is not None else int, default=default)
+    args = parser.parse_args()
+
+    options = SimpleNamespace(**{name: getattr(args, name) for name in DEFAULT_OPTIONS})
+    service = NullingService(options, batch_window=args.batch_window, max_batch=args.max_batch)
+
+    loop = asyncio.get_event_loop()
+    server = loop.run_until_complete(service.start(host=args.host, port=args.port, path=args.path))
+    try:
+        loop.run_until_complete(server.serve_forever())
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
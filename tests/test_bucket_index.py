@@ -0,0 +1,31 @@
+import numpy as np
+import pytest
+
+from utils.bucket_index import BucketIndex
+
+
+@pytest.mark.parametrize("bucket_count, size", [(8, 2000), (4, 300), (16, 50)])
+def test_best_partners_match_brute_force(bucket_count, size):
+    rng = np.random.default_rng(bucket_count)
+    patterns = rng.normal(size=size) + 1j * rng.normal(size=size)
+    index = BucketIndex(bucket_count)
+    index.build(patterns)
+
+    queries = patterns[rng.integers(0, size, size=200)]
+    partners = index.best_partners(queries)
+
+    opposite = (index.bucket_of(queries) + bucket_count // 2) % bucket_count
+    buckets = index.bucket_of(patterns)
+    for query, bucket, partner in zip(queries, opposite, partners):
+        members = np.nonzero(buckets == bucket)[0]
+        if len(members) == 0:
+            assert partner == -1
+            continue
+        assert index.bucket_of(patterns[partner]) == bucket
+        assert abs(query + patterns[partner]) == pytest.approx(np.abs(query + patterns[members]).min())
+
+
+def test_empty_opposite_bucket():
+    index = BucketIndex(4)
+    index.build(np.array([1 + 0.1j, 2 + 0.2j]))
+    assert list(index.best_partners(np.array([1 + 0.1j]))) == [-1]
@@ -0,0 +1,50 @@
+from math import log10
+from types import SimpleNamespace
+
+import numpy as np
+import pytest
+
+from algorithms.genetic_algorithm import GeneticAlgorithm
+from utils.pattern import steering_matrix
+from utils.robustness import MonteCarloRobustness
+
+
+def make_options(**overrides):
+    options = dict(
+        N=16, k=1.0, main_ang=90.0, null_degrees=[45.0], bit_count=6, bit_resolution=6,
+        sample_size=30, mutation_factor=0.1, cooking_factor=0.5, overwrite_mutations=True,
+        stop_criterion="iter", gen_to_repeat=20, time_limit=100, stop_after_score=60,
+        use_buckets=False, bucket_count=8, seed=1,
+    )
+    options.update(overrides)
+    return SimpleNamespace(**options)
+
+
+def null_depth(weights, null_degrees):
+    return -20 * log10(max(abs(steering_matrix(N=16, k=1.0, degrees=null_degrees) @ np.array(weights))))
+
+
+def test_analysis_uses_the_given_null_degrees():
+    options = make_options()
+    weights = np.exp(1j * np.random.default_rng(0).uniform(0, 2 * np.pi, 16))
+    analysis = MonteCarloRobustness(options, samples=1, null_degrees=[120.0])
+    # Without perturbations, the only sample is the nominal null depth
+    assert analysis.null_depths(weights)[0, 0] == pytest.approx(null_depth(weights, [120.0]))
+
+
+def test_robust_ranking_follows_reassigned_null_degrees():
+    solver = GeneticAlgorithm(make_options(robust_top_k=10, mc_samples=20, mc_phase_error=1.0))
+    solver.null_degrees = [120.0]
+    weights, score, _ = solver.solve()
+    assert score == pytest.approx(null_depth(weights, [120.0]))
+    # The robust pick is one of the best 10 at 120 degrees, so it stays a real null there
+    assert score > 10
+
+
+def test_tracked_updates_are_ranked_by_robustness():
+    solver = GeneticAlgorithm(make_options(robust_top_k=5, mc_samples=20, mc_phase_error=1.0, track_generations=5))
+    calls = []
+    rank = solver.rank_by_robustness
+    solver.rank_by_robustness = lambda top_k: calls.append(top_k) or rank(top_k)
+    list(solver.track([[120.0], [121.0]]))
+    assert calls == [5, 5]
@@ -0,0 +1,82 @@
+import asyncio
+import threading
+from types import SimpleNamespace
+
+import pytest
+
+from service.client import NullingClient
+from service.server import DEFAULT_OPTIONS, NullingService
+
+
+@pytest.fixture
+def service(tmp_path):
+    """Runs a NullingService on a Unix socket in a background event loop."""
+    path = str(tmp_path / "nulling.sock")
+    service = NullingService(SimpleNamespace(**dict(DEFAULT_OPTIONS, seed=1)), batch_window=0.05)
+    loop = asyncio.new_event_loop()
+    ready = threading.Event()
+
+    def run():
+        asyncio.set_event_loop(loop)
+        loop.run_until_complete(service.start(path=path))
+        ready.set()
+        loop.run_forever()
+
+    thread = threading.Thread(target=run, daemon=True)
+    thread.start()
+    assert ready.wait(5)
+    service.path = path
+    yield service
+
+    asyncio.run_coroutine_threadsafe(service.stop(), loop).result(5)
+    loop.call_soon_threadsafe(loop.stop)
+    thread.join(5)
+
+
+def test_concurrent_requests_are_batched(service):
+    count = 8
+    barrier = threading.Barrier(count)
+    results = [None] * count
+
+    def request(idx):
+        with NullingClient(path=service.path) as client:
+            barrier.wait()
+            results[idx] = client.solve([20 + 7 * idx, 160 - 5 * idx])
+
+    threads = [threading.Thread(target=request, args=(idx,)) for idx in range(count)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join(10)
+
+    for weights, score in results:
+        assert len(weights) == DEFAULT_OPTIONS["N"]
+        assert score > 100  # least squares nulls are exact up to rounding
+
+    with NullingClient(path=service.path) as client:
+        metrics = client.metrics()
+    assert metrics["requests"] == count
+    assert metrics["errors"] == 0
+    assert metrics["batches"] < count
+    assert metrics["latency_ms_p50"] is not None
+
+
+def test_solvers_stay_warm(service):
+    with NullingClient(path=service.path) as client:
+        for angle in [40, 50, 40]:
+            weights, score = client.solve([angle], alg="butterfly")
+            assert score > 20
+        client.solve([60], alg="butterfly", N=8)
+    # One instance per set of options, reused for every null angle
+    assert len(service.solvers) == 2
+
+
+def test_bad_requests_keep_the_connection(service):
+    with NullingClient(path=service.path) as client:
+        assert "error" in client.request([1, 2])
+        assert "error" in client.request({"alg": "unknown", "null_degrees": [45]})
+        with pytest.raises(RuntimeError):
+            client.solve([45] * 20)  # more nulls than the least squares solver can place
+        weights, score = client.solve([45])
+        assert score > 100
+        assert client.metrics()["errors"] == 2
@@ -0,0 +1,113 @@
+import os
+from types import SimpleNamespace
+
+import numpy as np
+import pytest
+
+from algorithms.solution_table_algorithm import SolutionTableAlgorithm
+from utils.solution_store import SolutionStore
+
+
+def make_store(tmp_path, angles=(40.0, 45.0, 50.0), N=4):
+    store = SolutionStore(str(tmp_path / "table.npy"), N)
+    for angle in angles:
+        store.insert(angle, [int(angle) % 64] * N, score=angle / 10)
+    return store
+
+
+def test_insert_keeps_the_angles_sorted(tmp_path):
+    store = make_store(tmp_path, angles=(50.0, 40.0, 45.0))
+    assert list(store.angles()) == [40.0, 45.0, 50.0]
+    assert store.pending == 3
+
+
+def test_insert_replaces_only_worse_solutions(tmp_path):
+    store = make_store(tmp_path)
+    store.insert(45.0, [1, 2, 3, 4], score=1.0)
+    assert store.record(1) == (45.0, 4.5, [45] * 4)
+    store.insert(45.0, [1, 2, 3, 4], score=9.0)
+    assert store.record(1) == (45.0, 9.0, [1, 2, 3, 4])
+    assert len(store) == 3
+
+
+@pytest.mark.parametrize("angle, bracket, nearest", [
+    (30.0, (None, 0), 0),
+    (42.0, (0, 1), 0),
+    (44.0, (0, 1), 1),
+    (45.0, (0, 1), 1),
+    (60.0, (2, None), 2),
+])
+def test_bracket_and_nearest(tmp_path, angle, bracket, nearest):
+    store = make_store(tmp_path)
+    assert store.bracket(angle) == bracket
+    assert store.nearest(angle) == nearest
+
+
+def test_empty_store(tmp_path):
+    store = SolutionStore(str(tmp_path / "empty.npy"), 4)
+    assert store.nearest(45.0) is None
+    assert store.bracket(45.0) == (None, None)
+
+
+def test_save_and_memory_mapped_reload(tmp_path):
+    store = make_store(tmp_path)
+    store.save()
+    assert store.pending == 0
+    assert isinstance(store.table, np.memmap)
+
+    reloaded = SolutionStore(store.path, 4)
+    assert isinstance(reloaded.table, np.memmap)
+    assert [reloaded.record(idx) for idx in range(3)] == [store.record(idx) for idx in range(3)]
+
+    # Inserting into a memory-mapped table copies it, and the file is only written by save()
+    reloaded.insert(47.0, [7] * 4, score=1.0)
+    assert len(reloaded) == 4
+    assert len(SolutionStore(store.path, 4)) == 3
+    reloaded.save()
+    assert list(SolutionStore(store.path, 4).angles()) == [40.0, 45.0, 47.0, 50.0]
+    assert not os.path.exists(store.path + ".tmp")
+
+
+def test_store_rejects_another_array_size(tmp_path):
+    store = make_store(tmp_path)
+    store.save()
+    with pytest.raises(AssertionError):
+        SolutionStore(store.path, 8)
+
+
+def make_table(tmp_path, **overrides):
+    options = dict(
+        N=16, k=1.0, main_ang=90.0, null_degrees=[45.0], bit_count=6, bit_resolution=6,
+        store_solver="butterfly", store_dir=str(tmp_path), seed=1,
+    )
+    options.update(overrides)
+    return SolutionTableAlgorithm(SimpleNamespace(**options))
+
+
+def test_interpolated_lookup_between_grid_points(tmp_path):
+    table = make_table(tmp_path, store_lookup="interpolate")
+    table.precompute([44.0, 45.0, 46.0, 47.0])
+
+    def no_solver(angle):
+        raise AssertionError("the solver should not run for {}".format(angle))
+    table.run_solver = no_solver
+
+    table.null_degrees = [45.5]
+    weights, score = table.solve()
+    assert len(table.store) == 4
+    assert score > 10
+
+
+def test_saves_are_batched(tmp_path):
+    table = make_table(tmp_path, store_flush_every=3)
+    for angle in [40.0, 50.0]:
+        table.null_degrees = [angle]
+        table.solve()
+    assert not os.path.exists(table.store_path())
+    table.flush()
+    assert len(SolutionStore(table.store_path(), 16)) == 2
+
+
+def test_pair_main_angle_is_keyed_by_its_components(tmp_path):
+    table = make_table(tmp_path, main_ang=(90.0, 10.0))
+    assert os.path.basename(table.store_path()).startswith("N16_k1_main90_10_")
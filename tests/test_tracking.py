@@ -0,0 +1,72 @@
+from math import log10
+from types import SimpleNamespace
+
+import numpy as np
+import pytest
+
+from algorithms.butterfly_algorithm import ButterflyAlgorithm
+from algorithms.genetic_algorithm import GeneticAlgorithm
+from algorithms.pareto_genetic_algorithm import ParetoGeneticAlgorithm
+from algorithms.thinned_genetic_algorithm import ThinnedGeneticAlgorithm
+from utils.pattern import steering_matrix
+
+
+def make_options(**overrides):
+    options = dict(
+        N=16,
+        k=1.0,
+        main_ang=90.0,
+        null_degrees=[45.0],
+        bit_count=6,
+        bit_resolution=6,
+        sample_size=30,
+        mutation_factor=0.1,
+        cooking_factor=0.5,
+        overwrite_mutations=True,
+        stop_criterion="iter",
+        gen_to_repeat=20,
+        time_limit=100,
+        stop_after_score=60,
+        use_buckets=False,
+        bucket_count=8,
+        seed=1,
+    )
+    options.update(overrides)
+    return SimpleNamespace(**options)
+
+
+def null_depth(weights, null_degrees, N=16):
+    pattern = steering_matrix(N=N, k=1.0, degrees=null_degrees) @ np.array(weights)
+    return -20 * log10(max(abs(pattern)))
+
+
+@pytest.mark.parametrize("solver_class", [GeneticAlgorithm, ButterflyAlgorithm])
+def test_track_solves_the_streamed_angles(solver_class):
+    # Updates are bounded by generations (GA) or run to convergence (butterfly), not by time
+    solver = solver_class(make_options(track_generations=20))
+    stream = [[120.0], [121.0], [122.0]]
+    for null_degrees, result in zip(stream, solver.track(iter(stream))):
+        weights, score = result[0], result[1]
+        # The reported score is the depth at the streamed angle, not at options.null_degrees
+        assert score == pytest.approx(null_depth(weights, null_degrees), abs=1e-6)
+        assert score > 15
+
+
+def test_track_accepts_scalar_updates():
+    solver = ButterflyAlgorithm(make_options())
+    results = list(solver.track([60.0, 61.0]))
+    assert len(results) == 2
+    assert solver.null_degrees == [61.0]
+
+
+def test_tracked_pareto_updates_return_the_front():
+    solver = ParetoGeneticAlgorithm(make_options(track_generations=5))
+    for weights, scores, generations in solver.track([[120.0], [121.0], [122.0]]):
+        assert isinstance(scores, np.ndarray)
+        assert scores.shape == (len(weights), len(ParetoGeneticAlgorithm.OBJECTIVES))
+
+
+def test_tracked_thinned_updates_report_the_power_saved():
+    solver = ThinnedGeneticAlgorithm(make_options(track_generations=5))
+    for weights, score, generations, power_saved in solver.track([[120.0], [121.0]]):
+        assert power_saved == pytest.approx(sum(w == 0 for w in weights) / len(weights))
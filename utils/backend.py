@@ -0,0 +1,112 @@
+from concurrent.futures import ThreadPoolExecutor
+import os
+
+import numpy as np
+
+from .pattern import steering_matrix, as_degree_array, complex_dtype, range_in_deg
+
+
+class ChunkedBackend():
+    """Evaluates patterns in chunks on a thread pool, writing into a preallocated output.
+
+    NumPy releases the GIL inside exp and matrix products, so the chunks run in parallel.
+    Chunks are sized so that the temporary arrays of all workers together stay below
+    memory_limit bytes (the output itself is not counted).
+    """
+
+    def __init__(self, max_workers=None, memory_limit=256 * 2**20):
+        self.max_workers = max_workers or os.cpu_count() or 1
+        self.memory_limit = memory_limit
+        self.pool = ThreadPoolExecutor(max_workers=self.max_workers)
+
+    def close(self):
+        self.pool.shutdown()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def chunk_sizes(self, candidates, directions, N, itemsize, candidate_rows=1024):
+        """Returns (candidate rows, direction rows) per chunk. A chunk holds the float64 phases
+        and the steering block of its directions, plus its (candidates x directions) result."""
+        budget = max(1, self.memory_limit // self.max_workers)
+        candidate_rows = max(1, min(candidates, candidate_rows))
+        direction_rows = max(1, budget // ((8 + itemsize) * N + itemsize * candidate_rows))
+        return candidate_rows, min(direction_rows, max(1, directions))
+
+    def run(self, tasks):
+        for future in [self.pool.submit(task) for task in tasks]:
+            future.result()
+
+    def array_factor(
+        self,
+        weights,
+        N=16,
+        k=1,
+        degrees=None,
+        calibration=None,
+        res=0.1,
+        positions=None,
+        precision="double",
+    ):
+        """Chunked, multi-threaded version of utils.pattern.array_factor."""
+        if degrees is None:
+            degrees = range_in_deg(res)
+        degrees = as_degree_array(degrees)
+        weights = np.asarray(weights, dtype=complex_dtype(precision))
+        batch = weights.reshape(-1, N)
+
+        output = np.empty((len(batch), len(degrees)), dtype=batch.dtype)
+        candidate_rows, direction_rows = self.chunk_sizes(len(batch), len(degrees), N, batch.itemsize)
+        # Split the directions at least once per worker, so small grids still run in parallel
+        direction_rows = min(direction_rows, -(-len(degrees) // self.max_workers))
+
+        def task(start):
+            stop = start + direction_rows
+            steering = steering_matrix(
+                N=N, k=k, degrees=degrees[start:stop], calibration=calibration,
+                positions=positions, precision=precision,
+            )
+            for first in range(0, len(batch), candidate_rows):
+                last = first + candidate_rows
+                output[first:last, start:stop] = batch[first:last] @ steering.T
+
+        self.run([lambda start=start: task(start) for start in range(0, len(degrees), direction_rows)])
+        return output.reshape(weights.shape[:-1] + (len(degrees),))
+
+    def project(self, weights, steering):
+        """Computes weights @ steering.T for a batch of weights (P, N) and a steering
+        matrix (M, N), splitting both the candidates and the directions into chunks."""
+        weights = np.asarray(weights)
+        dtype = np.result_type(weights.dtype, steering.dtype)
+        output = np.empty((len(weights), len(steering)), dtype=dtype)
+        # Each worker takes a share of the candidates; the directions are split to fit the budget
+        candidate_rows, direction_rows = self.chunk_sizes(
+            len(weights), len(steering), steering.shape[1], output.itemsize,
+            candidate_rows=-(-len(weights) // self.max_workers),
+        )
+
+        def task(first, start):
+            np.matmul(
+                weights[first:first + candidate_rows],
+                steering[start:start + direction_rows].T,
+                out=output[first:first + candidate_rows, start:start + direction_rows],
+            )
+
+        self.run([
+            lambda first=first, start=start: task(first, start)
+            for first in range(0, len(weights), candidate_rows)
+            for start in range(0, len(steering), direction_rows)
+        ])
+        return output
+
+
+def make_backend(options):
+    """Returns a ChunkedBackend if options.eval_threads asks for more than one thread, else None."""
+    threads = getattr(options, "eval_threads", 1)
+    if threads is None or threads <= 1:
+        return None
+    memory_limit = getattr(options, "eval_memory_limit", 256) * 2**20
+    return ChunkedBackend(max_workers=threads, memory_limit=memory_limit)
@@ -0,0 +1,93 @@
+from math import pi
+
+import numpy as np
+
+
+class BucketIndex():
+    """Groups complex pattern values into phase buckets, each sorted by magnitude.
+
+    All buckets share one sorted array keyed by (bucket, magnitude), so finding the
+    members of a bucket or the values closest to a magnitude is a binary search.
+    """
+
+    def __init__(self, bucket_count, window=4):
+        self.bucket_count = bucket_count
+        self.window = window
+        self.clear()
+
+    def clear(self):
+        self.patterns = np.zeros(0, dtype=complex)
+        self.order = np.zeros(0, dtype=int)
+        self.keys = np.zeros(0)
+        self.magnitudes = np.zeros(0)
+        self.starts = np.zeros(self.bucket_count + 1, dtype=int)
+        self.scale = 1.0
+
+    def bucket_of(self, patterns):
+        """Returns the bucket of each pattern value, based on its phase."""
+        return (((np.angle(patterns) + pi) / (2 * pi)) * self.bucket_count).astype(int) % self.bucket_count
+
+    def build(self, patterns):
+        """Indexes the given pattern values. Results refer to positions in this array."""
+        self.patterns = np.asarray(patterns, dtype=complex)
+        buckets = self.bucket_of(self.patterns)
+        magnitudes = np.abs(self.patterns)
+        # Magnitudes are scaled into [0, 1) so that bucket + magnitude sorts by bucket first
+        self.scale = 1.0 / (magnitudes.max() * 2 + 1) if len(magnitudes) > 0 else 1.0
+        keys = buckets + magnitudes * self.scale
+        self.order = np.argsort(keys, kind='stable')
+        self.keys = keys[self.order]
+        self.magnitudes = magnitudes[self.order]
+        self.starts = np.searchsorted(self.keys, np.arange(self.bucket_count + 1))
+
+    def sizes(self):
+        return np.diff(self.starts)
+
+    def members(self, bucket):
+        return self.order[self.starts[bucket]:self.starts[bucket + 1]]
+
+    def sample_members(self, buckets, uniforms):
+        """Picks one member of each given bucket, using uniform random numbers in [0, 1)."""
+        sizes = self.sizes()[buckets]
+        return self.order[self.starts[buckets] + (uniforms * sizes).astype(int)]
+
+    def best_partners(self, queries):
+        """For each query value, finds the member of the opposite bucket that best cancels it,
+        i.e. minimizes |query + partner|. Returns -1 where the opposite bucket is empty.
+
+        The members with the closest magnitudes (a window around the binary search position)
+        are compared first. Since |query + partner| >= ||query| - |partner||, a member outside
+        the window cannot do better once the best one beats the magnitude gap at both edges of
+        the window; the window is doubled for the other queries, so the result is exact.
+        """
+        queries = np.asarray(queries, dtype=complex)
+        query_magnitudes = np.abs(queries)
+        opposite = (self.bucket_of(queries) + self.bucket_count // 2) % self.bucket_count
+        lo = self.starts[opposite]
+        hi = self.starts[opposite + 1]
+        positions = np.searchsorted(self.keys, opposite + query_magnitudes * self.scale)
+
+        partners = np.full(len(queries), -1)
+        active = np.nonzero(hi > lo)[0]
+        window = self.window
+        while len(active) > 0:
+            pos, first, last = positions[active], lo[active], hi[active] - 1
+            candidates = np.clip(pos[:, None] + np.arange(-window, window), first[:, None], last[:, None])
+            members = self.order[candidates]
+            cancellation = np.abs(queries[active, None] + self.patterns[members])
+            best = np.argmin(cancellation, axis=1)
+            partners[active] = members[np.arange(len(active)), best]
+
+            # Members below the window are smaller than the query, and members above it larger
+            below, above = pos - window - 1, pos + window
+            gap_below = np.where(
+                below >= first, query_magnitudes[active] - self.magnitudes[np.maximum(below, 0)], np.inf
+            )
+            gap_above = np.where(
+                above <= last, self.magnitudes[np.minimum(above, len(self.magnitudes) - 1)]
+                - query_magnitudes[active], np.inf
+            )
+            done = cancellation[np.arange(len(active)), best] <= np.minimum(gap_below, gap_above)
+            active = active[~done]
+            window *= 2
+        return partners
@@ -0,0 +1,50 @@
+from collections import deque
+
+import numpy as np
+
+
+class ConvergenceTracker():
+    """Tracks the best score and the gene diversity of a sample over the last generations.
+
+    Every gene value is mapped to a point of embedding (one row per value, see
+    Chromosome.gene_embedding), so that e.g. phase codes that wrap around are neighbours.
+    The diversity is the total variance of these points, averaged over the gene positions
+    and divided by that of uniformly random genes, so it is about 1 for a random sample
+    and 0 once it has converged.
+    """
+
+    def __init__(self, embedding, window=20, min_improvement=0.1, min_diversity=0.05):
+        self.embedding = np.asarray(embedding, dtype=float)
+        self.window = window
+        self.min_improvement = min_improvement
+        self.min_diversity = min_diversity
+        self.uniform_variance = self.embedding.var(axis=0).sum()
+        self.reset()
+
+    def reset(self):
+        self.best_scores = deque(maxlen=self.window + 1)
+        self.diversity = 1.0
+
+    def update(self, best_score, genes):
+        self.best_scores.append(best_score)
+        points = self.embedding[np.asarray(genes, dtype=int)]  # shape (sample, N, dimensions)
+        variance = points.var(axis=0).sum(axis=-1).mean()
+        self.diversity = variance / self.uniform_variance if self.uniform_variance > 0 else 0.0
+
+    def improvement(self, window=None):
+        """Returns the best score improvement over the last window generations (the tracker's
+        window by default), or inf if fewer generations have been tracked."""
+        window = self.window if window is None else window
+        if len(self.best_scores) <= window:
+            return float("inf")
+        return self.best_scores[-1] - self.best_scores[-1 - window]
+
+    def stagnated(self):
+        """True once the best score has not improved by min_improvement over the window.
+        A converged sample is judged over a quarter of the window, since its next
+        generations are mostly copies of the same genes."""
+        window = max(1, self.window // 4) if self.converged() else self.window
+        return self.improvement(window) < self.min_improvement
+
+    def converged(self):
+        return self.diversity < self.min_diversity
@@ -17,4 +17,20 @@ def vectorWrapToPi(vector):
 
 def wrapToPi(theta):
     """Wraps an angle in the [-π, π] range."""
-    return phase(exp(1j * theta))
\ No newline at end of file
+    return phase(exp(1j * theta))
+
+def phase_to_code(angle, bit_count, bit_resolution):
+    """Converts a phase (in radians) to the phase shifter code used by the algorithms."""
+    return int((angle * 2**bit_resolution / (2*pi)) + 0.5*(2**bit_count-1))
+
+def code_to_phase(code, bit_count, bit_resolution):
+    """Converts a phase shifter code back to its phase (in radians)."""
+    return (code - (2**bit_count-1)/2) * (2*pi) / (2**bit_resolution)
+
+def weights_to_codes(weights, bit_count, bit_resolution):
+    """Quantizes a list of complex weights to phase shifter codes."""
+    return [phase_to_code(phase(w), bit_count, bit_resolution) for w in weights]
+
+def codes_to_weights(codes, bit_count, bit_resolution):
+    """Returns the e^{iθ} weights for a list of phase shifter codes."""
+    return [exp(1j * code_to_phase(int(c), bit_count, bit_resolution)) for c in codes]
@@ -0,0 +1,49 @@
+import numpy as np
+
+
+def dominance_matrix(objectives):
+    """Returns D with D[i, j] True if solution i dominates solution j.
+    objectives has one row per solution and is minimized in every column."""
+    objectives = np.asarray(objectives)
+    no_worse = np.all(objectives[:, None, :] <= objectives[None, :, :], axis=2)
+    better = np.any(objectives[:, None, :] < objectives[None, :, :], axis=2)
+    return no_worse & better
+
+def non_dominated_sort(objectives):
+    """Returns the front index (0 for the Pareto front) of every solution.
+    Each front is peeled off with one vectorized update of the domination counts."""
+    dominates = dominance_matrix(objectives)
+    dominated_count = dominates.sum(axis=0)
+    ranks = np.full(len(dominated_count), -1)
+
+    rank = 0
+    front = np.nonzero(dominated_count == 0)[0]
+    while len(front) > 0:
+        ranks[front] = rank
+        dominated_count = dominated_count - dominates[front].sum(axis=0)
+        dominated_count[ranks >= 0] = -1
+        front = np.nonzero(dominated_count == 0)[0]
+        rank += 1
+    return ranks
+
+def crowding_distance(objectives, ranks):
+    """Returns the NSGA-II crowding distance of every solution within its front.
+    The extreme solutions of each front get an infinite distance."""
+    objectives = np.asarray(objectives, dtype=float)
+    distance = np.zeros(len(objectives))
+    for rank in np.unique(ranks):
+        members = np.nonzero(ranks == rank)[0]
+        values = objectives[members]
+        order = np.argsort(values, axis=0)
+        sorted_values = np.take_along_axis(values, order, axis=0)
+        spread = sorted_values[-1] - sorted_values[0]
+        spread[spread == 0] = 1
+
+        gaps = np.zeros_like(values)
+        gaps[1:-1] = (sorted_values[2:] - sorted_values[:-2]) / spread
+        gaps[0] = gaps[-1] = np.inf
+        # Scatter the gaps back from sorted order to the members' order, then sum the objectives
+        member_gaps = np.zeros_like(gaps)
+        np.put_along_axis(member_gaps, order, gaps, axis=0)
+        distance[members] = member_gaps.sum(axis=1)
+    return distance
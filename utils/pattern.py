@@ -1,6 +1,8 @@
 from cmath import exp
 from math import pi, radians
 
+import numpy as np
+
 from .converter import deg_to_u, range_in_deg
 
 
@@ -12,7 +14,8 @@ def compute_pattern(
     single_patterns=None,
     calibration=None,
     degrees=None,
-    use_absolute_value=True
+    use_absolute_value=True,
+    positions=None,
 ):
     """Computes the pattern absolute value of the given parameters.
 
@@ -22,6 +25,8 @@ def compute_pattern(
     single_pattern: the pattern of each single antenna element.
     calibraiton: the calibartion values of each antenna element. 
     degrees: the degrees for which the pattern should be computed.
+        May also hold (azimuth, elevation) pairs, see direction_vectors.
+    positions: the element positions, see element_positions. 
 
     weights and single_patterns are assumed to be normalized. 
     calibration values are assumed to be in degrees. 
@@ -35,6 +40,7 @@ def compute_pattern(
         single_patterns=single_patterns,
         calibration=calibration,
         degrees=degrees,
+        positions=positions,
     )
 
     pattern = [sum(pattern_i) for pattern_i in single_pattern]
@@ -48,6 +54,7 @@ def compute_single_pattern(
     single_patterns=None,
     calibration=None,
     degrees=None,
+    positions=None,
 ):
     """Computes the single pattern of each of the antennas given the parameters in a nested list.
     see compute_pattern for more details.
@@ -64,13 +71,17 @@ def compute_single_pattern(
     if calibration is None:
         calibration = [0] * N
 
-    cos_degs = deg_to_u(degrees)
-    calibration_rad = [radians(x) for x in calibration]
-
     assert (
         len(weights) == len(calibration) == len(single_patterns) == N
     ), "some vector here has the wrong length! (weights, calibration, single_patterns)"
 
+    if positions is not None or any(np.ndim(x) > 0 for x in degrees):
+        steering = steering_matrix(N=N, k=k, degrees=degrees, calibration=calibration, positions=positions)
+        return (steering * np.asarray(weights) * np.asarray(single_patterns).T).tolist()
+
+    cos_degs = deg_to_u(degrees)
+    calibration_rad = [radians(x) for x in calibration]
+
     single_pattern = [
         [
             weights[ant_i] * exp(-1j * (k * pi * u * ant_i - calibration_rad[ant_i]))
@@ -82,5 +93,129 @@ def compute_single_pattern(
     return single_pattern
 
 
+def element_positions(N=16, positions=None):
+    """Returns the element positions as an (N, 3) array, in units of the element spacing d.
+    positions may have 1, 2 or 3 coordinates per element; by default the elements form
+    a uniform linear array along the x axis."""
+    if positions is None:
+        return np.column_stack([np.arange(N), np.zeros(N), np.zeros(N)])
+
+    positions = np.asarray(positions, dtype=float)
+    if positions.ndim == 1:
+        positions = positions[:, None]
+    assert positions.shape[1] <= 3, "positions should have at most 3 coordinates per element"
+    return np.pad(positions, ((0, 0), (0, 3 - positions.shape[1])))
+
+def as_degree_array(degrees):
+    """Converts a list of angles, (azimuth, elevation) pairs or a mix of both to an array
+    of shape (M,) or (M, 2)."""
+    if isinstance(degrees, np.ndarray):
+        return degrees.astype(float)
+    if all(np.ndim(x) == 0 for x in degrees):
+        return np.array(degrees, dtype=float)
+    return np.array([(x, 0) if np.ndim(x) == 0 else tuple(x) for x in degrees], dtype=float)
+
+def direction_vectors(degrees):
+    """Returns unit direction vectors as an (M, 3) array.
+
+    degrees is either a list of angles from the array axis (as in compute_pattern),
+    or a list of (azimuth, elevation) pairs in degrees. An angle θ is the same
+    direction as the pair (θ, 0), so u = cos(θ) is the x component in both cases.
+    """
+    degrees = as_degree_array(degrees)
+    if degrees.ndim == 1:
+        degrees = np.column_stack([degrees, np.zeros(len(degrees))])
+    azimuth = np.radians(degrees[:, 0])
+    elevation = np.radians(degrees[:, 1])
+    return np.column_stack([
+        np.cos(elevation) * np.cos(azimuth),
+        np.cos(elevation) * np.sin(azimuth),
+        np.sin(elevation),
+    ])
+
+def direction_grid(az_res=1, el_res=1, az_range=(0, 180), el_range=(-90, 90)):
+    """Returns every (azimuth, elevation) pair of a 2-D grid, as an (M, 2) array."""
+    azimuth = np.arange(az_range[0], az_range[1] + az_res, az_res)
+    elevation = np.arange(el_range[0], el_range[1] + el_res, el_res)
+    az, el = np.meshgrid(azimuth, elevation, indexing='ij')
+    return np.column_stack([az.ravel(), el.ravel()])
+
+PRECISIONS = {
+    "double": (np.float64, np.complex128),
+    "single": (np.float32, np.complex64),
+}
+
+def complex_dtype(precision="double"):
+    """Returns the complex dtype used for the given precision (double or single)."""
+    assert precision in PRECISIONS, "precision should be one of {}".format(list(PRECISIONS))
+    return PRECISIONS[precision][1]
+
+def steering_matrix(N=16, k=1, degrees=None, calibration=None, res=0.1, positions=None, precision="double"):
+    """Vectorized version of compute_single_pattern for unit weights.
+
+    Returns a numpy array with one row per direction and one column per antenna element,
+    so the pattern of a weight vector w is steering_matrix(...) @ w. See direction_vectors
+    for the accepted degrees and element_positions for the accepted positions.
+    With precision="single" the result is complex64, which halves the memory traffic
+    when screening many candidates; the phases are still computed in double.
+    """
+    if degrees is None:
+        degrees = range_in_deg(res)
+
+    assert precision in PRECISIONS, "precision should be one of {}".format(list(PRECISIONS))
+    positions = element_positions(N, positions)
+    assert len(positions) == N, "positions should have one row per antenna element"
+
+    phases = k * pi * (direction_vectors(degrees) @ positions.T)
+    if calibration is not None:
+        phases -= np.radians(np.asarray(calibration, dtype=float))
+    if precision == "double":
+        return np.exp(-1j * phases)
+
+    real_dtype, cpx_dtype = PRECISIONS[precision]
+    # Wrapping first keeps the single precision phases accurate for large arrays
+    phases = np.remainder(phases, 2 * pi).astype(real_dtype)
+    return np.exp(cpx_dtype(-1j) * phases)
+
+def array_factor(
+    weights,
+    N=16,
+    k=1,
+    degrees=None,
+    calibration=None,
+    res=0.1,
+    positions=None,
+    max_chunk_elements=2**22,
+    precision="double",
+    backend=None,
+):
+    """Computes the complex pattern of one weight vector (N,) or a batch of them (P, N).
+
+    The directions are processed in chunks so that no steering block has more than
+    max_chunk_elements entries, which bounds the memory used by large 2-D angle grids.
+    Returns an array of shape (M,) or (P, M) for M directions, in the given precision.
+    If a backend (see utils.backend) is given, the chunks are computed by the backend instead.
+    """
+    if backend is not None:
+        return backend.array_factor(
+            weights, N=N, k=k, degrees=degrees, calibration=calibration,
+            res=res, positions=positions, precision=precision,
+        )
+    if degrees is None:
+        degrees = range_in_deg(res)
+    degrees = as_degree_array(degrees)
+    weights = np.asarray(weights, dtype=complex_dtype(precision))
+
+    chunk = max(1, max_chunk_elements // N)
+    pattern = np.empty(weights.shape[:-1] + (len(degrees),), dtype=weights.dtype)
+    for start in range(0, len(degrees), chunk):
+        steering = steering_matrix(
+            N=N, k=k, degrees=degrees[start:start + chunk], calibration=calibration,
+            positions=positions, precision=precision,
+        )
+        pattern[..., start:start + chunk] = weights @ steering.T
+    return pattern
+
+
 if __name__ == "__main__":
     print(compute_pattern())
@@ -0,0 +1,15 @@
+import numpy as np
+
+
+def make_rng(seed=None):
+    """Returns a numpy Generator. seed may be None, an int, a SeedSequence or a Generator,
+    which is returned as is so that solvers can share a stream."""
+    if isinstance(seed, np.random.Generator):
+        return seed
+    return np.random.default_rng(seed)
+
+def spawn_rngs(seed, count):
+    """Returns count independent Generators derived from seed, e.g. one per worker process."""
+    if not isinstance(seed, np.random.SeedSequence):
+        seed = np.random.SeedSequence(seed)
+    return [np.random.default_rng(child) for child in seed.spawn(count)]
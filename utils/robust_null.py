@@ -0,0 +1,119 @@
+from collections import OrderedDict
+from math import log10
+
+import numpy as np
+
+from .pattern import steering_matrix, as_degree_array
+
+
+class RobustNullObjective():
+    """Evaluates nulls over a set of frequencies and an angular span around each null.
+
+    A frequency offset scales k (d over lambda), so the steering tensor has one
+    (angles, N) block per k value, where the angles are span_points points spread
+    over span degrees around every null. The tensor is computed once and reused.
+    """
+
+    def __init__(
+        self,
+        N=16,
+        k_values=(1,),
+        null_degrees=(90,),
+        span=0.0,
+        span_points=1,
+        positions=None,
+        precision="double",
+    ):
+        self.N = N
+        self.k_values = list(k_values)
+        self.null_degrees = null_degrees
+        self.degrees = self.span_degrees(null_degrees, span, span_points)
+        self.tensor = np.stack([
+            steering_matrix(N=N, k=k, degrees=self.degrees, positions=positions, precision=precision)
+            for k in self.k_values
+        ])  # shape (frequencies, angles, N)
+
+    @classmethod
+    def from_options(cls, options, null_degrees=None, precision="double"):
+        """Builds the objective from the robust_* options, around options.k."""
+        bandwidth = getattr(options, "robust_bandwidth", 0.0)
+        freq_points = getattr(options, "robust_freq_points", 3) if bandwidth > 0 else 1
+        return cls(
+            N=options.N,
+            k_values=options.k * (1 + np.linspace(-bandwidth / 2, bandwidth / 2, freq_points)),
+            null_degrees=options.null_degrees if null_degrees is None else null_degrees,
+            span=getattr(options, "robust_span", 0.0),
+            span_points=getattr(options, "robust_span_points", 1),
+            positions=getattr(options, "positions", None),
+            precision=precision,
+        )
+
+    @staticmethod
+    def span_degrees(null_degrees, span, span_points):
+        """Spreads span_points directions over span degrees (of azimuth) around each null."""
+        offsets = np.linspace(-span / 2, span / 2, span_points) if span_points > 1 else np.zeros(1)
+        degrees = as_degree_array(null_degrees)
+        if degrees.ndim == 1:
+            return (degrees[:, None] + offsets).ravel()
+        spread = np.repeat(degrees, len(offsets), axis=0)
+        spread[:, 0] += np.tile(offsets, len(degrees))
+        return spread
+
+    def steering(self):
+        """Returns the tensor flattened to one row per (frequency, angle)."""
+        return self.tensor.reshape(-1, self.N)
+
+    def patterns(self, weights, backend=None):
+        """Returns the complex pattern of one weight vector (N,) or a batch (P, N),
+        with shape (frequencies, angles) or (P, frequencies, angles).
+        A ChunkedBackend (see utils.backend) splits the product over its threads."""
+        weights = np.asarray(weights, dtype=self.tensor.dtype)
+        if backend is None:
+            flat = weights @ self.steering().T
+        else:
+            flat = backend.project(weights.reshape(-1, self.N), self.steering())
+        return flat.reshape(weights.shape[:-1] + self.tensor.shape[:2])
+
+    def worst_case(self, weights, backend=None):
+        """Returns the largest |pattern| over all frequencies and angles, per weight vector."""
+        patterns = np.abs(self.patterns(weights, backend))
+        return patterns.reshape(patterns.shape[:-2] + (-1,)).max(axis=-1)
+
+    def score(self, weights):
+        """Returns the worst-case null depth (in dB) of one weight vector."""
+        return -20 * log10(float(self.worst_case(weights)))
+
+
+def null_steering(options, null_degrees, precision="double"):
+    """Returns the steering rows that the null objective is evaluated on: the null degrees
+    themselves, or every (frequency, angle) of a RobustNullObjective if options.objective
+    is "robust"."""
+    if getattr(options, "objective", "nominal") == "robust":
+        return RobustNullObjective.from_options(options, null_degrees, precision).steering()
+    return steering_matrix(
+        N=options.N, k=options.k, degrees=null_degrees,
+        positions=getattr(options, "positions", None), precision=precision,
+    )
+
+
+class SteeringCache():
+    """Memoizes null_steering for one set of options (N, k, positions and objective), so
+    that solvers answering many requests do not rebuild the steering of repeated null degrees.
+    The max_entries most recently used null degree lists are kept."""
+
+    def __init__(self, options, precision="double", max_entries=1024):
+        self.options = options
+        self.precision = precision
+        self.max_entries = max_entries
+        self.entries = OrderedDict()
+
+    def __call__(self, null_degrees):
+        key = tuple(float(x) if np.ndim(x) == 0 else tuple(map(float, x)) for x in null_degrees)
+        if key in self.entries:
+            self.entries.move_to_end(key)
+            return self.entries[key]
+        steering = null_steering(self.options, null_degrees, self.precision)
+        self.entries[key] = steering
+        if len(self.entries) > self.max_entries:
+            self.entries.popitem(last=False)
+        return steering
@@ -0,0 +1,91 @@
+import numpy as np
+
+from .rng import make_rng
+from .robust_null import null_steering
+
+
+class MonteCarloRobustness():
+    """Estimates how the null depth of solved weights degrades under hardware errors.
+
+    An ensemble of samples perturbations is drawn once: a random phase shifter error and
+    calibration offset (both normal, std in degrees, on top of the fixed calibration values
+    used in compute_single_pattern) and random element failures. Every solution is evaluated
+    against the same ensemble, all in one batched pattern computation, so that they can be
+    compared fairly. The null depth of a sample is the depth of its shallowest null,
+    at null_degrees (options.null_degrees by default).
+    """
+
+    def __init__(
+        self,
+        options,
+        samples=1000,
+        phase_error=0.0,
+        calibration_error=0.0,
+        failure_rate=0.0,
+        calibration=None,
+        rng=None,
+        backend=None,
+        null_degrees=None,
+    ):
+        self.N = options.N
+        self.samples = samples
+        self.backend = backend
+        self.null_degrees = options.null_degrees if null_degrees is None else null_degrees
+        self.steering = null_steering(options, self.null_degrees)
+        self.factors = self.perturbation_ensemble(
+            make_rng(rng if rng is not None else getattr(options, "seed", None)),
+            phase_error, calibration_error, failure_rate, calibration,
+        )
+
+    @classmethod
+    def from_options(cls, options, rng=None, backend=None, null_degrees=None):
+        return cls(
+            options,
+            samples=getattr(options, "mc_samples", 1000),
+            phase_error=getattr(options, "mc_phase_error", 0.0),
+            calibration_error=getattr(options, "mc_calibration_error", 0.0),
+            failure_rate=getattr(options, "mc_failure_rate", 0.0),
+            rng=rng,
+            backend=backend,
+            null_degrees=null_degrees,
+        )
+
+    def perturbation_ensemble(self, rng, phase_error, calibration_error, failure_rate, calibration):
+        """Returns the (samples, N) complex factors that multiply the weights."""
+        offsets = np.zeros(self.N) if calibration is None else np.asarray(calibration, dtype=float)
+        degrees = (
+            offsets
+            + rng.normal(0.0, phase_error, size=(self.samples, self.N))
+            + rng.normal(0.0, calibration_error, size=(self.samples, self.N))
+        )
+        alive = rng.random((self.samples, self.N)) >= failure_rate
+        return np.exp(1j * np.radians(degrees)) * alive
+
+    def null_depths(self, weights):
+        """Returns the null depth (in dB) of every solution under every perturbation, with shape
+        (solutions, samples); weights is one weight vector (N,) or a batch (solutions, N)."""
+        weights = np.atleast_2d(np.asarray(weights, dtype=complex))
+        perturbed = (weights[:, None, :] * self.factors[None, :, :]).reshape(-1, self.N)
+        if self.backend is None:
+            patterns = perturbed @ self.steering.T
+        else:
+            patterns = self.backend.project(perturbed, self.steering)
+        worst = np.abs(patterns).max(axis=1).reshape(len(weights), self.samples)
+        return -20 * np.log10(np.maximum(worst, 1e-15))
+
+    def robust_scores(self, weights, percentile=5):
+        """Returns the given (low) percentile of the null depth of every solution."""
+        return np.percentile(self.null_depths(weights), percentile, axis=1)
+
+    def summary(self, weights, percentiles=(5, 50, 95)):
+        """Returns one dict per solution with the mean, std and percentiles of its null depth."""
+        depths = self.null_depths(weights)
+        values = np.percentile(depths, percentiles, axis=1)
+        return [
+            dict(
+                mean=float(depths[idx].mean()),
+                std=float(depths[idx].std()),
+                **{"p{:g}".format(p): float(values[jdx, idx]) for jdx, p in enumerate(percentiles)}
+            )
+            for idx in range(len(depths))
+        ]
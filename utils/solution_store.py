@@ -0,0 +1,82 @@
+import os
+
+import numpy as np
+
+
+class SolutionStore():
+    """A table of precomputed phase codes for single-null problems, sorted by null angle.
+
+    The table is kept in a .npy file of fixed-size records, so it can be memory-mapped
+    and searched in O(log n) without loading it. Inserted records are kept in memory
+    until save() writes the whole table back, so callers should batch their saves
+    (pending counts the records inserted since the last save).
+    """
+
+    def __init__(self, path, N):
+        self.path = path
+        self.N = N
+        self.pending = 0
+        if os.path.exists(path):
+            self.table = np.load(path, mmap_mode='r')
+            assert self.table.dtype == self.record_dtype(N), \
+                "solution store {} was built for a different array".format(path)
+        else:
+            self.table = np.zeros(0, dtype=self.record_dtype(N))
+
+    @staticmethod
+    def record_dtype(N):
+        return np.dtype([("angle", "<f8"), ("score", "<f8"), ("code", "<u2", (N,))])
+
+    def __len__(self):
+        return len(self.table)
+
+    def angles(self):
+        return self.table["angle"]
+
+    def bracket(self, angle):
+        """Returns the indices of the stored angles right below and above the given angle.
+        Either index is None if there is no such angle."""
+        idx = int(np.searchsorted(self.angles(), angle))
+        lo = idx - 1 if idx > 0 else None
+        hi = idx if idx < len(self.table) else None
+        return lo, hi
+
+    def nearest(self, angle):
+        """Returns the index of the stored angle closest to the given angle, or None if empty."""
+        lo, hi = self.bracket(angle)
+        if lo is None or hi is None:
+            return hi if lo is None else lo
+        angles = self.angles()
+        return lo if angle - angles[lo] <= angles[hi] - angle else hi
+
+    def record(self, idx):
+        """Returns (angle, score, code) of a stored record."""
+        entry = self.table[idx]
+        return float(entry["angle"]), float(entry["score"]), [int(c) for c in entry["code"]]
+
+    def insert(self, angle, code, score):
+        """Inserts a solution, replacing the stored one for the same angle if it scores worse."""
+        idx = int(np.searchsorted(self.angles(), angle))
+        if idx < len(self.table) and self.table[idx]["angle"] == angle:
+            if self.table[idx]["score"] >= score:
+                return
+            self.table = np.array(self.table)
+            self.table[idx] = (angle, score, code)
+        else:
+            entry = np.array([(angle, score, code)], dtype=self.table.dtype)
+            self.table = np.concatenate([self.table[:idx], entry, self.table[idx:]])
+        self.pending += 1
+
+    def save(self):
+        """Writes the table to disk atomically and memory-maps it again."""
+        if self.pending == 0:
+            return
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        tmp_path = self.path + ".tmp"
+        with open(tmp_path, "wb") as tmp_file:
+            np.save(tmp_file, np.ascontiguousarray(self.table))
+        os.replace(tmp_path, self.path)
+        self.table = np.load(self.path, mmap_mode='r')
+        self.pending = 0